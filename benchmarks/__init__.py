@@ -1,10 +1,15 @@
 from .registration import Benchmark, registry
 
 
-raft = Benchmark(name="raft")
-gem = Benchmark(name="gem")
-dummy = Benchmark(name="dummy")
+# The evaluation modules are only imported when a benchmark is scored
+raft = Benchmark(name="raft", batch=True, parallel=True)
+gem = Benchmark(name="gem", batch=True)
+dummy = Benchmark(name="dummy", batch=True)
+generic_competition = Benchmark(
+    name="generic_competition", batch=True, streaming=True, submission_fields=("user_id", "submission_id")
+)
 
 registry.register_benchmark(raft)
 registry.register_benchmark(gem)
 registry.register_benchmark(dummy)
+registry.register_benchmark(generic_competition)
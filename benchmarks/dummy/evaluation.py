@@ -1,35 +1,39 @@
+from functools import partial
+from typing import Dict, List, Optional
+
+import numpy as np
 from datasets import load_dataset
-from evaluate import load  # type: ignore
 
-from hf_benchmarks import Evaluation, Metric, Result, Task
+from hf_benchmarks import (
+    Evaluation,
+    Metric,
+    Result,
+    SubmissionResult,
+    Task,
+    align_predictions,
+    get_metric,
+    read_columns,
+    run_batch,
+)
 
 
-def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_token: str) -> Evaluation:
-    """Computes metrics for a benchmark.
-
-    Args:
-        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
-        submission_dataset (:obj:`str`): Name of user submission dataset with model predictions.
-        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+def _load_references(evaluation_dataset: str, use_auth_token: str) -> Dict[str, np.ndarray]:
+    evaluation_ds = load_dataset(evaluation_dataset, use_auth_token=use_auth_token, split="test")
+    # Rows are matched by ID when the labels have one, and by position otherwise
+    columns = ["id", "label"] if "id" in evaluation_ds.column_names else ["label"]
+    return read_columns(evaluation_ds, columns)
 
-    Returns:
-        evaluation (:obj:`Evaluation`): The evaluation metrics.
-    """
 
-    # Load datasets associated with benchmark
-    evaluation_ds = load_dataset(evaluation_dataset, use_auth_token=use_auth_token, split="test")
-    submission_ds = load_dataset(submission_dataset, use_auth_token=use_auth_token, split="test")
-    # Load metric
-    f1 = load("f1")
+def _score_submission(
+    references: Dict[str, np.ndarray], submission: Dict[str, str], use_auth_token: str
+) -> Evaluation:
+    submission_ds = load_dataset(submission["submission_dataset"], use_auth_token=use_auth_token, split="test")
+    predictions = align_predictions(references, submission_ds, label_column="label", id_column="id")
     # Define container to store metrics
     evaluation = Evaluation(results=[])
     # Compute metrics and build up list of dictionaries, one per task in the benchmark
     task_data = Task(name="default", type="text-classification", metrics=[])
-    scores = f1.compute(
-        predictions=submission_ds["label"],
-        references=evaluation_ds["label"],
-        average="macro",
-    )
+    scores = get_metric("f1").compute(predictions=predictions, references=references["label"], average="macro")
     for k, v in scores.items():
         task_data["metrics"].append(Metric(name=k, type=k, value=v))
     # Collect results
@@ -37,3 +41,38 @@ def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_t
     evaluation["results"].append(result)
 
     return evaluation
+
+
+def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_token: str) -> Evaluation:
+    """Computes metrics for a benchmark.
+
+    Args:
+        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
+        submission_dataset (:obj:`str`): Name of user submission dataset with model predictions.
+        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+
+    Returns:
+        evaluation (:obj:`Evaluation`): The evaluation metrics.
+    """
+    references = _load_references(evaluation_dataset, use_auth_token)
+    return _score_submission(references, {"submission_dataset": submission_dataset}, use_auth_token)
+
+
+def compute_metrics_batch(
+    evaluation_dataset: str, submissions: List[Dict[str, str]], use_auth_token: str, workers: Optional[int] = None
+) -> List[SubmissionResult]:
+    """Computes metrics for many submissions, loading the ground truth labels only once.
+
+    Args:
+        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
+        submissions (:obj:`List[Dict[str, str]]`): The submissions to score, each with the `submission_dataset`
+            with model predictions.
+        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+        workers (:obj:`int`, `optional`): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        results (:obj:`List[SubmissionResult]`): The evaluation or error of each submission, in input order.
+    """
+    references = _load_references(evaluation_dataset, use_auth_token)
+    score_fn = partial(_score_submission, use_auth_token=use_auth_token)
+    return run_batch(score_fn, references, submissions, workers, metrics=["f1"])
@@ -1,13 +1,117 @@
+import contextlib
+import io
 import json
+import os
 import subprocess
-from typing import List
+import sys
+import tempfile
+import threading
+from functools import partial
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, Optional
 
 from huggingface_hub import hf_hub_download  # type: ignore
 
+from hf_benchmarks import SubmissionResult, run_batch
+
+
+# AutoTrain runs the evaluation job inside a Docker container, so we need to
+# save the metrics in the root directory to avoid permission errors.
+METRICS_DIR = os.getenv("GEM_METRICS_DIR", "/app" if os.path.isdir("/app") else None)
+
+# The command that runs gem_metrics in its own process
+GEM_METRICS_COMMAND = ["gem_metrics"]
+
+# The gem_metrics CLI, imported once per batch worker process so that later submissions reuse its loaded stack.
+# gem_metrics is installed from the tip of its repository, so only its CLI is relied on. The CLI reads its arguments
+# from `sys.argv` and prints to stdout, which are shared by the whole process. It is therefore only run in-process by the worker
+# processes of `compute_metrics_batch`, which do no other work, and one submission at a time.
+_gem_metrics_main: Optional[Callable[[], Any]] = None
+_gem_metrics_lock = threading.Lock()
+
+
+def _load_gem_metrics_main() -> Callable[[], Any]:
+    global _gem_metrics_main
+    if _gem_metrics_main is None:
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            scripts = list(eps.select(group="console_scripts", name="gem_metrics"))
+        else:
+            scripts = [ep for ep in eps.get("console_scripts", []) if ep.name == "gem_metrics"]
+        if len(scripts) == 0:
+            raise ImportError("gem_metrics is not installed, see benchmarks/gem/requirements.txt")
+        _gem_metrics_main = scripts[0].load()
+    return _gem_metrics_main
+
+
+def _read_metrics(metrics_filepath: str, returncode: int, output: str) -> dict:
+    if returncode != 0 or not os.path.exists(metrics_filepath):
+        raise ValueError(f"gem_metrics exited with code {returncode}: {output[-1000:]}")
+    with open(metrics_filepath, "r") as f:
+        return json.load(f)
+
+
+def _run_gem_metrics(submission_filepath: str) -> dict:
+    """Runs gem_metrics in a subprocess, writing its output to a unique path."""
+    with tempfile.TemporaryDirectory(dir=METRICS_DIR) as tmp_dir:
+        metrics_filepath = os.path.join(tmp_dir, "metrics.json")
+        process = subprocess.run(
+            [*GEM_METRICS_COMMAND, submission_filepath, "-o", metrics_filepath],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        return _read_metrics(metrics_filepath, process.returncode, process.stdout)
+
+
+def _run_gem_metrics_in_process(submission_filepath: str) -> dict:
+    """Runs the gem_metrics CLI in the current batch worker process, writing its output to a unique path."""
+    main = _load_gem_metrics_main()
+    with tempfile.TemporaryDirectory(dir=METRICS_DIR) as tmp_dir:
+        metrics_filepath = os.path.join(tmp_dir, "metrics.json")
+        stdout = io.StringIO()
+        with _gem_metrics_lock:
+            argv = sys.argv
+            sys.argv = ["gem_metrics", submission_filepath, "-o", metrics_filepath]
+            try:
+                with contextlib.redirect_stdout(stdout):
+                    result = main()
+                # Console scripts run `sys.exit(main())`, so an integer result is the exit code
+                returncode = result if isinstance(result, int) else 0
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+            finally:
+                sys.argv = argv
+        return _read_metrics(metrics_filepath, returncode, stdout.getvalue())
+
+
+def _score_submission(
+    references: None,
+    submission: Dict[str, str],
+    use_auth_token: str,
+    run_gem_metrics: Callable[[str], dict] = _run_gem_metrics,
+) -> List[dict]:
+    submission_dataset = submission["submission_dataset"]
+    # This assumes that the GEM submissions are a single file, with a predefined name
+    # We'll need to enforce this on the submission repositories
+    submission_filename = "submission.json"
+    submission_filepath = hf_hub_download(
+        repo_id=submission_dataset, filename=submission_filename, repo_type="dataset", use_auth_token=use_auth_token
+    )
+    # gem_metrics automatically downloads the evaluation splits from the Hub
+    try:
+        metrics = run_gem_metrics(submission_filepath)
+    except ValueError as e:
+        raise ValueError(f"Error running gem_metrics for submission {submission_dataset}: {e}") from e
+    return [metrics]
+
 
 def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_token: str) -> List[dict]:
     """Computes metrics for a benchmark.
 
+    gem_metrics runs in its own process, so this leaves the state of the calling process untouched and may be called
+    from several threads at once.
+
     Args:
         evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
         submission_dataset (:obj:`str`): Name of user submission dataset with model predictions.
@@ -16,23 +120,28 @@ def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_t
     Returns:
         metrics (:obj:`List[dict]`): The evaluation metrics.
     """
-    # AutoTrain runs the evaluation job inside a Docker container, so we need to
-    # save the metrics in the root directory to avoid permission errors.
-    metrics_filepath = "/app/metrics.json"
-    # This assumes that the GEM submissions are a single file, with a predefined name
-    # We'll need to enforce this on the submission repositories
-    submission_filename = "submission.json"
-    submission_filepath = hf_hub_download(
-        repo_id=submission_dataset, filename=submission_filename, repo_type="dataset", use_auth_token=use_auth_token
-    )
-    # gem_metrics automatically downloads the evaluation splits from the Hub
-    process = subprocess.run(
-        ["gem_metrics", f"{submission_filepath}", "-o", f"{metrics_filepath}"], stdout=subprocess.PIPE
-    )
-    if process.returncode == -1:
-        raise ValueError(f"Error running gem_metrics for submission {submission_dataset} on {evaluation_dataset}!")
-    else:
-        with open(metrics_filepath, "r") as f:
-            metrics = json.load(f)
+    return _score_submission(None, {"submission_dataset": submission_dataset}, use_auth_token)
 
-    return [metrics]
+
+def compute_metrics_batch(
+    evaluation_dataset: str, submissions: List[Dict[str, str]], use_auth_token: str, workers: Optional[int] = None
+) -> List[SubmissionResult]:
+    """Computes metrics for many submissions in persistent worker processes.
+
+    Each worker imports gem_metrics once and scores its share of the submissions in turn, writing each output to its
+    own temporary file. With `workers=1`, every submission is scored in its own gem_metrics subprocess instead, since
+    running the CLI in the calling process would change its `sys.argv` and stdout.
+
+    Args:
+        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
+        submissions (:obj:`List[Dict[str, str]]`): The submissions to score, each with the `submission_dataset`
+            with model predictions.
+        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+        workers (:obj:`int`, `optional`): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        results (:obj:`List[SubmissionResult]`): The metrics or error of each submission, in input order.
+    """
+    run_gem_metrics = _run_gem_metrics if workers == 1 else _run_gem_metrics_in_process
+    score_fn = partial(_score_submission, use_auth_token=use_auth_token, run_gem_metrics=run_gem_metrics)
+    return run_batch(score_fn, None, submissions, workers)
@@ -1,9 +1,44 @@
-import json
+import warnings
+from functools import partial
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd  # type: ignore
 from huggingface_hub import hf_hub_download  # type: ignore
 from sklearn import metrics  # type: ignore
 
+from hf_benchmarks import SubmissionResult, run_batch
+
+from .ground_truth import GROUND_TRUTH_CACHE, GroundTruth, download_solution
+from .streaming import StreamingNotSupportedError, stream_scores
+
+
+def align_submission(solution_ids: pd.Index, sub_df: pd.DataFrame, target_cols: List[str]) -> np.ndarray:
+    """Aligns the rows of a submission with the rows of the solution by `id`.
+
+    Args:
+        solution_ids (:obj:`pd.Index`): The unique ids of the solution rows.
+        sub_df (:obj:`pd.DataFrame`): The submission, with an `id` column and one column per target.
+        target_cols (:obj:`List[str]`): The names of the target columns.
+
+    Returns:
+        y_pred (:obj:`np.ndarray`): Contiguous array of predicted targets, in the same order as the solution rows.
+    """
+    duplicated_ids = sub_df["id"][sub_df["id"].duplicated()].unique()
+    if len(duplicated_ids) > 0:
+        raise ValueError(
+            f"The submission contains {len(duplicated_ids)} duplicate ids, e.g. {duplicated_ids[:5].tolist()}"
+        )
+    positions = pd.Index(sub_df["id"]).get_indexer(solution_ids)
+    missing_ids = solution_ids.to_numpy()[positions == -1]
+    if len(missing_ids) > 0:
+        raise ValueError(f"The submission is missing {len(missing_ids)} ids, e.g. {missing_ids[:5].tolist()}")
+    num_extra_ids = len(sub_df) - len(solution_ids)
+    if num_extra_ids > 0:
+        warnings.warn(f"Ignoring {num_extra_ids} ids in the submission that are not in the solution")
+
+    return np.ascontiguousarray(sub_df[target_cols].to_numpy()[positions])
+
 
 def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_token: str, **kwargs):
     """Computes metrics for a benchmark.
@@ -12,6 +47,13 @@ def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_t
         evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
         submission_dataset (:obj:`str`): Name of user submission dataset with model predictions.
         use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+        user_id (:obj:`str`): ID of the user who made the submission.
+        submission_id (:obj:`str`): ID of the submission.
+        revision (:obj:`str`, `optional`): Revision of the evaluation dataset. The parsed solution is cached per
+            revision, so pinning it to a commit SHA keeps the cache valid when the solution is updated.
+        chunksize (:obj:`int`, `optional`): If set, the solution and submission are streamed in chunks of this many
+            rows to bound memory usage. Metrics that cannot be computed chunk by chunk, and submissions whose rows
+            are not in the same order as the solution, fall back to loading both files in full.
 
     Returns:
         evaluation (:obj:`Evaluation`): The evaluation metrics.
@@ -24,52 +66,78 @@ def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_t
     if submission_id is None:
         raise ValueError("submission_id is required")
 
-    eval_fname = hf_hub_download(
-        repo_id=evaluation_dataset,
-        filename="solution.csv",
-        use_auth_token=use_auth_token,
-        repo_type="dataset",
-    )
-    # download conf
-    conf_fname = hf_hub_download(
-        repo_id=evaluation_dataset,
-        filename="conf.json",
+    revision = kwargs.get("revision", None)
+
+    submission_filename = f"submissions/{user_id}-{submission_id}.csv"
+    sub_fname = hf_hub_download(
+        repo_id=submission_dataset,
+        filename=submission_filename,
         use_auth_token=use_auth_token,
         repo_type="dataset",
     )
 
-    # read conf json
-    with open(conf_fname, "r") as f:
-        conf = json.load(f)
+    chunksize = kwargs.get("chunksize", None)
+    if chunksize is not None:
+        eval_fname, conf = download_solution(evaluation_dataset, use_auth_token, revision=revision)
+        try:
+            return stream_scores(eval_fname, sub_fname, conf["EVAL_METRIC"], chunksize)
+        except StreamingNotSupportedError:
+            pass
 
-    metric = conf["EVAL_METRIC"]
+    ground_truth = _load_references(evaluation_dataset, use_auth_token, revision=revision)
+    return _score_submission_file(ground_truth, sub_fname)
 
-    eval_df = pd.read_csv(eval_fname)
 
-    submission_filename = f"submissions/{user_id}-{submission_id}.csv"
+def compute_metrics_batch(
+    evaluation_dataset: str,
+    submissions: List[Dict[str, str]],
+    use_auth_token: str,
+    workers: Optional[int] = None,
+    revision: Optional[str] = None,
+) -> List[SubmissionResult]:
+    """Computes metrics for many submissions, loading and parsing the solution only once.
+
+    Args:
+        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
+        submissions (:obj:`List[Dict[str, str]]`): The submissions to score, each with the `submission_dataset`,
+            `user_id` and `submission_id` passed to `compute_metrics`.
+        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+        workers (:obj:`int`, `optional`): Number of worker processes. Defaults to the number of CPUs.
+        revision (:obj:`str`, `optional`): Revision of the evaluation dataset.
+
+    Returns:
+        results (:obj:`List[SubmissionResult]`): The evaluation or error of each submission, in input order.
+    """
+    ground_truth = _load_references(evaluation_dataset, use_auth_token, revision=revision)
+    return run_batch(partial(_score_submission, use_auth_token=use_auth_token), ground_truth, submissions, workers)
+
+
+def _load_references(evaluation_dataset: str, use_auth_token: str, revision: Optional[str] = None) -> GroundTruth:
+    # The parsed solution is shared by all the submissions scored in this process
+    return GROUND_TRUTH_CACHE.get(evaluation_dataset, use_auth_token, revision=revision)
+
+
+def _score_submission(ground_truth: GroundTruth, submission: Dict[str, str], use_auth_token: str) -> Dict:
     sub_fname = hf_hub_download(
-        repo_id=submission_dataset,
-        filename=submission_filename,
+        repo_id=submission["submission_dataset"],
+        filename=f"submissions/{submission['user_id']}-{submission['submission_id']}.csv",
         use_auth_token=use_auth_token,
         repo_type="dataset",
     )
+    return _score_submission_file(ground_truth, sub_fname)
+
+
+def _score_submission_file(ground_truth: GroundTruth, sub_fname: str) -> Dict:
     sub_df = pd.read_csv(sub_fname)
 
     # fetch the metric function
-    _metric = getattr(metrics, metric)
-
-    public_ids = eval_df[eval_df.split == "public"].id.values
-    private_ids = eval_df[eval_df.split == "private"].id.values
+    _metric = getattr(metrics, ground_truth.metric)
 
-    target_cols = [col for col in eval_df.columns if col not in ["id", "split"]]
-    public_score = _metric(
-        eval_df[eval_df.id.isin(public_ids)][target_cols],
-        sub_df[sub_df.id.isin(public_ids)][target_cols],
-    )
-    private_score = _metric(
-        eval_df[eval_df.id.isin(private_ids)][target_cols],
-        sub_df[sub_df.id.isin(private_ids)][target_cols],
-    )
+    y_true = ground_truth.y_true
+    y_pred = align_submission(ground_truth.ids, sub_df, ground_truth.target_cols)
+    public_mask, private_mask = ground_truth.public_mask, ground_truth.private_mask
+    public_score = _metric(y_true[public_mask], y_pred[public_mask])
+    private_score = _metric(y_true[private_mask], y_pred[private_mask])
 
     evaluation = {
         "public_score": public_score,
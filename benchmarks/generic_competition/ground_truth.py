@@ -0,0 +1,118 @@
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd  # type: ignore
+from huggingface_hub import hf_hub_download  # type: ignore
+
+
+@dataclass
+class GroundTruth:
+    """The parsed solution of a competition, ready to score submissions against."""
+
+    metric: str
+    target_cols: List[str]
+    # The index keeps its hash table between submissions, so aligning a submission is a single lookup
+    ids: pd.Index
+    y_true: np.ndarray
+    public_mask: np.ndarray
+    private_mask: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.memory_usage() + self.y_true.nbytes + self.public_mask.nbytes + self.private_mask.nbytes
+
+
+def download_solution(
+    evaluation_dataset: str, use_auth_token: str, revision: Optional[str] = None
+) -> Tuple[str, dict]:
+    """Downloads the solution of a competition, returning its local path and the competition configuration."""
+    eval_fname = hf_hub_download(
+        repo_id=evaluation_dataset,
+        filename="solution.csv",
+        use_auth_token=use_auth_token,
+        repo_type="dataset",
+        revision=revision,
+    )
+    conf_fname = hf_hub_download(
+        repo_id=evaluation_dataset,
+        filename="conf.json",
+        use_auth_token=use_auth_token,
+        repo_type="dataset",
+        revision=revision,
+    )
+    with open(conf_fname, "r") as f:
+        conf = json.load(f)
+    return eval_fname, conf
+
+
+def load_ground_truth(evaluation_dataset: str, use_auth_token: str, revision: Optional[str] = None) -> GroundTruth:
+    """Downloads and parses the solution and configuration of a competition."""
+    eval_fname, conf = download_solution(evaluation_dataset, use_auth_token, revision=revision)
+    eval_df = pd.read_csv(eval_fname)
+    ids = pd.Index(eval_df["id"])
+    if not ids.is_unique:
+        raise ValueError("The solution contains duplicate ids!")
+    target_cols = [col for col in eval_df.columns if col not in ["id", "split"]]
+    # Compute both split masks from a single pass over the split column
+    split_codes = pd.Categorical(eval_df["split"], categories=["public", "private"]).codes
+    return GroundTruth(
+        metric=conf["EVAL_METRIC"],
+        target_cols=target_cols,
+        ids=ids,
+        y_true=np.ascontiguousarray(eval_df[target_cols].to_numpy()),
+        public_mask=split_codes == 0,
+        private_mask=split_codes == 1,
+    )
+
+
+class GroundTruthCache:
+    """Process-wide LRU cache of parsed competition solutions, keyed by (evaluation dataset, revision).
+
+    Entries are evicted in least recently used order once there are more than `max_entries` of them or they take
+    more than `max_bytes` in total. Since entries are keyed by revision, long-running processes should pin the
+    revision to a commit SHA or call `clear` when a solution is updated.
+
+    Args:
+        max_entries (:obj:`int`): The maximum number of cached solutions.
+        max_bytes (:obj:`int`): The maximum total size of the cached solutions.
+    """
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 2 * 1024**3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], GroundTruth]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, evaluation_dataset: str, use_auth_token: str, revision: Optional[str] = None) -> GroundTruth:
+        key = (evaluation_dataset, revision)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        ground_truth = load_ground_truth(evaluation_dataset, use_auth_token, revision=revision)
+        with self._lock:
+            self._entries[key] = ground_truth
+            self._entries.move_to_end(key)
+            self._evict()
+        return ground_truth
+
+    def _evict(self) -> None:
+        # The most recently used entry is always kept, even if it is larger than `max_bytes` on its own
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or sum(gt.nbytes for gt in self._entries.values()) > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+GROUND_TRUTH_CACHE = GroundTruthCache()
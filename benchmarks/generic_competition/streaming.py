@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd  # type: ignore
+from sklearn import metrics  # type: ignore
+
+
+# Metrics that only depend on the confusion counts of (label, prediction) pairs
+CONFUSION_METRICS = {
+    "accuracy_score",
+    "balanced_accuracy_score",
+    "cohen_kappa_score",
+    "f1_score",
+    "jaccard_score",
+    "matthews_corrcoef",
+    "precision_score",
+    "recall_score",
+}
+# Metrics that only depend on per-column sums over the rows
+REGRESSION_METRICS = {"mean_absolute_error", "mean_squared_error", "r2_score", "max_error"}
+
+
+class StreamingNotSupportedError(Exception):
+    """Raised when a submission cannot be scored chunk by chunk, so that the caller falls back to a full load."""
+
+
+class ConfusionAccumulator:
+    """Accumulates the counts of (label, prediction) pairs for classification metrics.
+
+    The metric is computed by sklearn on the distinct pairs weighted by their counts, which gives exactly the same
+    result as on the full arrays while keeping memory proportional to the number of classes squared.
+    """
+
+    def __init__(self, metric: str):
+        self.metric = metric
+        self.counts: Optional[pd.Series] = None
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        if y_true.shape[1] != 1:
+            raise StreamingNotSupportedError(f"{self.metric} can only be streamed for a single target column")
+        pairs = pd.DataFrame({"y_true": y_true[:, 0], "y_pred": y_pred[:, 0]}).value_counts(dropna=False)
+        self.counts = pairs if self.counts is None else self.counts.add(pairs, fill_value=0)
+
+    def compute(self) -> float:
+        if self.counts is None:
+            raise StreamingNotSupportedError(f"Cannot compute {self.metric} without any rows")
+        pairs = self.counts.index.to_frame(index=False)
+        return getattr(metrics, self.metric)(
+            pairs["y_true"].to_numpy(), pairs["y_pred"].to_numpy(), sample_weight=self.counts.to_numpy()
+        )
+
+
+class RegressionAccumulator:
+    """Accumulates per-column sums for regression metrics, averaged uniformly over the target columns."""
+
+    def __init__(self, metric: str):
+        self.metric = metric
+        self.num_rows = 0
+        self.sums: Dict[str, np.ndarray] = {}
+
+    def _add(self, name: str, value: np.ndarray) -> None:
+        self.sums[name] = self.sums[name] + value if name in self.sums else value
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        y_true = y_true.astype("float64")
+        errors = y_true - y_pred.astype("float64")
+        self.num_rows += len(y_true)
+        self._add("squared_error", np.sum(errors**2, axis=0))
+        self._add("absolute_error", np.sum(np.abs(errors), axis=0))
+        self._add("y", np.sum(y_true, axis=0))
+        self._add("y_squared", np.sum(y_true**2, axis=0))
+        if len(errors) > 0:
+            max_error = np.max(np.abs(errors), axis=0)
+            self.sums["max_error"] = np.maximum(self.sums.get("max_error", max_error), max_error)
+
+    def compute(self) -> float:
+        if self.num_rows == 0:
+            raise StreamingNotSupportedError(f"Cannot compute {self.metric} without any rows")
+        if self.metric == "mean_squared_error":
+            return float(np.mean(self.sums["squared_error"] / self.num_rows))
+        if self.metric == "mean_absolute_error":
+            return float(np.mean(self.sums["absolute_error"] / self.num_rows))
+        if self.metric == "max_error":
+            if len(self.sums["max_error"]) != 1:
+                raise StreamingNotSupportedError("max_error does not support multiple target columns")
+            return float(self.sums["max_error"][0])
+        # r2_score, following sklearn's conventions for constant targets
+        total_sum_of_squares = self.sums["y_squared"] - self.sums["y"] ** 2 / self.num_rows
+        scores = np.ones_like(total_sum_of_squares)
+        nonzero_total = total_sum_of_squares != 0
+        scores[nonzero_total] = 1 - self.sums["squared_error"][nonzero_total] / total_sum_of_squares[nonzero_total]
+        scores[~nonzero_total & (self.sums["squared_error"] != 0)] = 0.0
+        return float(np.mean(scores))
+
+
+def make_accumulator(metric: str):
+    """Returns a mergeable accumulator for `metric`, or None if the metric cannot be computed chunk by chunk."""
+    if metric in CONFUSION_METRICS:
+        return ConfusionAccumulator(metric)
+    if metric in REGRESSION_METRICS:
+        return RegressionAccumulator(metric)
+    return None
+
+
+def stream_scores(eval_fname: str, sub_fname: str, metric: str, chunksize: int) -> Dict[str, float]:
+    """Scores a submission by reading the solution and submission CSVs in aligned chunks.
+
+    Peak memory is bounded by `chunksize`, whatever the size of the files. Both files must list the same ids in the
+    same order; otherwise `StreamingNotSupportedError` is raised and the caller should fall back to a full load.
+
+    Args:
+        eval_fname (:obj:`str`): Path to the solution CSV, with `id` and `split` columns.
+        sub_fname (:obj:`str`): Path to the submission CSV, with an `id` column.
+        metric (:obj:`str`): Name of the sklearn metric.
+        chunksize (:obj:`int`): Number of rows read from each file at a time.
+
+    Returns:
+        scores (:obj:`Dict[str, float]`): The public and private scores.
+    """
+    if make_accumulator(metric) is None:
+        raise StreamingNotSupportedError(f"{metric} cannot be computed chunk by chunk")
+    accumulators = {"public": make_accumulator(metric), "private": make_accumulator(metric)}
+    target_cols: Optional[List[str]] = None
+    eval_chunks = pd.read_csv(eval_fname, chunksize=chunksize)
+    sub_chunks = pd.read_csv(sub_fname, chunksize=chunksize)
+    for eval_chunk, sub_chunk in _zip_chunks(eval_chunks, sub_chunks):
+        if target_cols is None:
+            target_cols = [col for col in eval_chunk.columns if col not in ["id", "split"]]
+        if not np.array_equal(eval_chunk["id"].to_numpy(), sub_chunk["id"].to_numpy()):
+            raise StreamingNotSupportedError("The submission rows are not in the same order as the solution rows")
+        split_codes = pd.Categorical(eval_chunk["split"], categories=["public", "private"]).codes
+        y_true = eval_chunk[target_cols].to_numpy()
+        y_pred = sub_chunk[target_cols].to_numpy()
+        for code, split in enumerate(["public", "private"]):
+            mask = split_codes == code
+            accumulators[split].update(y_true[mask], y_pred[mask])
+    return {f"{split}_score": accumulator.compute() for split, accumulator in accumulators.items()}
+
+
+def _zip_chunks(eval_chunks, sub_chunks):
+    """Zips two chunked CSV readers, raising if they do not have the same number of rows."""
+    sentinel = object()
+    while True:
+        eval_chunk = next(eval_chunks, sentinel)
+        sub_chunk = next(sub_chunks, sentinel)
+        if eval_chunk is sentinel and sub_chunk is sentinel:
+            return
+        if eval_chunk is sentinel or sub_chunk is sentinel or len(eval_chunk) != len(sub_chunk):
+            raise StreamingNotSupportedError("The submission and solution do not have the same number of rows")
+        yield eval_chunk, sub_chunk
@@ -1,11 +1,85 @@
-from datasets import get_dataset_config_names, load_dataset, load_metric
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, TypeVar
 
-from hf_benchmarks import Evaluation, Metric, Result, Task
+import numpy as np
+from datasets import get_dataset_config_names, load_dataset
+
+from hf_benchmarks import (
+    Evaluation,
+    Metric,
+    Result,
+    SubmissionResult,
+    Task,
+    align_predictions,
+    get_metric,
+    read_columns,
+    run_batch,
+)
+
+
+# The tasks are independent and mostly wait on I/O, so they are loaded and scored in parallel threads
+NUM_WORKERS = int(os.getenv("RAFT_NUM_WORKERS", 4))
+
+T = TypeVar("T")
+
+
+def _map_tasks(fn: Callable[[str], T], tasks: List[str], num_workers: int) -> List[T]:
+    """Applies `fn` to every task in a thread pool, returning the results in the order of `tasks`."""
+    if num_workers == 1:
+        return [fn(task) for task in tasks]
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(fn, tasks))
+
+
+def _load_task_references(evaluation_dataset: str, task: str, use_auth_token: str) -> Dict[str, np.ndarray]:
+    evaluation_ds = load_dataset(path=evaluation_dataset, name=task, use_auth_token=use_auth_token, split="test")
+    return read_columns(evaluation_ds, ["ID", "Label"])
+
+
+def _load_references(
+    evaluation_dataset: str, use_auth_token: str, num_workers: int = NUM_WORKERS
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Loads the IDs and ground truth labels of each task."""
+    # We need to use the public dataset to get the task names
+    tasks = sorted(get_dataset_config_names("ought/raft"))
+    load_task = partial(_load_task_references, evaluation_dataset, use_auth_token=use_auth_token)
+    labels = _map_tasks(load_task, tasks, num_workers)
+    return dict(zip(tasks, labels))
+
+
+def _score_task(references: Dict[str, np.ndarray], submission_dataset: str, task: str, use_auth_token: str) -> Result:
+    task_data = Task(name=task, type="text-classification", metrics=[])
+    # Load datasets associated with task
+    submission_ds = load_dataset(path=submission_dataset, name=task, use_auth_token=use_auth_token, split="test")
+    # Match the predictions with the labels by ID to ensure we compare the correct examples
+    predictions = align_predictions(references, submission_ds, label_column="Label", id_column="ID")
+    # Compute metrics and build up list of dictionaries, one per task in the benchmark
+    scores = get_metric("f1").compute(predictions=predictions, references=references["Label"], average="macro")
+    for k, v in scores.items():
+        task_data["metrics"].append(Metric(name=k, type=k, value=v))
+    return Result(task=task_data)
+
+
+def _score_submission(
+    references: Dict[str, Dict[str, np.ndarray]],
+    submission: Dict[str, str],
+    use_auth_token: str,
+    num_workers: int = NUM_WORKERS,
+) -> Evaluation:
+    def score_task(task: str) -> Result:
+        return _score_task(references[task], submission["submission_dataset"], task, use_auth_token)
+
+    # Collect results in sorted task order, whichever task finishes first
+    return Evaluation(results=_map_tasks(score_task, sorted(references), num_workers))
 
 
 def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_token: str) -> Evaluation:
     """Computes metrics for a benchmark.
 
+    The tasks are loaded and scored in parallel with `RAFT_NUM_WORKERS` threads (4 by default).
+
     Args:
         evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
         submission_dataset (:obj:`str`): Name of user submission dataset with model predictions.
@@ -14,32 +88,31 @@ def compute_metrics(evaluation_dataset: str, submission_dataset: str, use_auth_t
     Returns:
         evaluation (:obj:`Evaluation`): The evaluation metrics.
     """
+    references = _load_references(evaluation_dataset, use_auth_token)
+    return _score_submission(references, {"submission_dataset": submission_dataset}, use_auth_token)
 
-    # We need to use the public dataset to get the task names
-    tasks = get_dataset_config_names("ought/raft")
-    # Load metric
-    f1 = load_metric("f1")
-    # Define container to store metrics
-    evaluation = Evaluation(results=[])
-    # Iterate over tasks and build up metrics
-    for task in sorted(tasks):
-        task_data = Task(name=task, type="text-classification", metrics=[])
-        # Load datasets associated with task
-        evaluation_ds = load_dataset(path=evaluation_dataset, name=task, use_auth_token=use_auth_token, split="test")
-        submission_ds = load_dataset(path=submission_dataset, name=task, use_auth_token=use_auth_token, split="test")
-        # Sort IDs to ensure we compare the correct examples
-        evaluation_ds = evaluation_ds.sort("ID")
-        submission_ds = submission_ds.sort("ID")
-        # Compute metrics and build up list of dictionaries, one per task in the benchmark
-        scores = f1.compute(
-            predictions=submission_ds["Label"],
-            references=evaluation_ds["Label"],
-            average="macro",
-        )
-        for k, v in scores.items():
-            task_data["metrics"].append(Metric(name=k, type=k, value=v))
-        # Collect results
-        result = Result(task=task_data)
-        evaluation["results"].append(result)
-
-    return evaluation
+
+def compute_metrics_batch(
+    evaluation_dataset: str,
+    submissions: List[Dict[str, str]],
+    use_auth_token: str,
+    workers: Optional[int] = None,
+    task_workers: int = NUM_WORKERS,
+) -> List[SubmissionResult]:
+    """Computes metrics for many submissions, loading the ground truth labels of every task only once.
+
+    Args:
+        evaluation_dataset (:obj:`str`): Name of private dataset with ground truth labels.
+        submissions (:obj:`List[Dict[str, str]]`): The submissions to score, each with the `submission_dataset`
+            with model predictions.
+        use_auth_token (:obj:`str`): The API token to access your private dataset on the Hugging Face Hub.
+        workers (:obj:`int`, `optional`): Number of worker processes. Defaults to the number of CPUs.
+        task_workers (:obj:`int`, `optional`): Number of tasks loaded and scored in parallel for each submission.
+            Defaults to the `RAFT_NUM_WORKERS` environment variable, or 4.
+
+    Returns:
+        results (:obj:`List[SubmissionResult]`): The evaluation or error of each submission, in input order.
+    """
+    references = _load_references(evaluation_dataset, use_auth_token, num_workers=task_workers)
+    score_fn = partial(_score_submission, use_auth_token=use_auth_token, num_workers=task_workers)
+    return run_batch(score_fn, references, submissions, workers, metrics=["f1"])
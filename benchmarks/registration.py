@@ -1,18 +1,83 @@
+import importlib
+import threading
 from dataclasses import dataclass
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Callable, Optional, Tuple
+
+
+# External packages register their benchmarks under this entry point group, e.g. in their `setup.py`:
+#   entry_points={"hf_benchmarks.benchmarks": ["my-benchmark = my_package.benchmark:benchmark"]}
+# where `my_package.benchmark` is a lightweight module that defines a `Benchmark`.
+ENTRY_POINT_GROUP = "hf_benchmarks.benchmarks"
 
 
 @dataclass
 class Benchmark:
+    """
+    A benchmark and the lazy reference to its evaluation code.
+
+    The evaluation module is only imported when its functions are first used, so that listing the benchmarks or
+    scoring one of them never pays for the dependencies of the others.
+
+    Args:
+        name: Name of the benchmark.
+        evaluation_module: Import path of the module with the `compute_metrics` function. Defaults to
+            `benchmarks.<name>.evaluation`.
+        batch: Whether the module has a `compute_metrics_batch` function that scores many submissions at once. Each
+            submission is passed to it as a dict with the `submission_dataset` and the `submission_fields`.
+        streaming: Whether submissions can be scored in chunks, to bound memory usage.
+        parallel: Whether a single submission is scored in parallel, e.g. one task per thread.
+        submission_fields: Names of the keyword arguments of `compute_metrics` that identify a submission besides its
+            `submission_dataset`, e.g. the `user_id` and `submission_id` of a competition entry.
+    """
+
     name: str
+    evaluation_module: Optional[str] = None
+    batch: bool = False
+    streaming: bool = False
+    parallel: bool = False
+    submission_fields: Tuple[str, ...] = ()
+
+    def load_evaluation(self) -> ModuleType:
+        """
+        Import the evaluation module of the benchmark, once per process.
+
+        Returns:
+            The evaluation module.
+        """
+        return importlib.import_module(self.evaluation_module or f"benchmarks.{self.name}.evaluation")
+
+    @property
+    def compute_metrics(self) -> Callable:
+        return self.load_evaluation().compute_metrics
+
+    @property
+    def compute_metrics_batch(self) -> Callable:
+        if not self.batch:
+            raise ValueError(f"Benchmark {self.name} does not support batch evaluation.")
+        return self.load_evaluation().compute_metrics_batch
+
+
+def _iter_entry_points():
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return eps.select(group=ENTRY_POINT_GROUP)
+    return eps.get(ENTRY_POINT_GROUP, [])
 
 
 class BenchmarkRegistry:
     """
     Registry for all registered benchmarks.
+
+    Benchmarks of other packages are discovered through the `hf_benchmarks.benchmarks` entry points the first time
+    the registry is queried.
     """
 
     def __init__(self):
         self.benchmarks = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
 
     def register_benchmark(self, benchmark):
         """
@@ -26,6 +91,18 @@ class BenchmarkRegistry:
             raise ValueError(f"Benchmark with name {name} already registered.")
         self.benchmarks[name] = benchmark
 
+    def _load_entry_points(self):
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            # Entry points are only loaded once, even if one of them is invalid
+            self._entry_points_loaded = True
+            for entry_point in _iter_entry_points():
+                benchmark = entry_point.load()
+                if benchmark.name != entry_point.name:
+                    raise ValueError(f"Entry point {entry_point.name} refers to a benchmark named {benchmark.name}.")
+                self.register_benchmark(benchmark)
+
     def get_benchmark(self, name):
         """
         Get a registered benchmark.
@@ -36,6 +113,8 @@ class BenchmarkRegistry:
         Returns:
             Benchmark with the given name.
         """
+        if name not in self.benchmarks:
+            self._load_entry_points()
         if name not in self.benchmarks:
             raise ValueError("Benchmark with name {} not registered.".format(name))
         return self.benchmarks[name]
@@ -47,6 +126,7 @@ class BenchmarkRegistry:
         Returns:
             List of all registered benchmarks.
         """
+        self._load_entry_points()
         return list(self.benchmarks.values())
 
 
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+import pandas as pd
+import typer
+
+from hf_benchmarks import is_time_between, is_time_between_batch
+
+
+app = typer.Typer()
+
+
+def make_timestamps(num_records: int, seed: int = 42) -> list:
+    """Generates `lastModified` values in the Hub's ISO 8601 format, spread over a year."""
+    rng = np.random.default_rng(seed)
+    offsets = pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, size=num_records), unit="s")
+    timestamps = pd.Timestamp("2022-01-01", tz="UTC") + offsets
+    return [t.strftime("%Y-%m-%dT%H:%M:%S.000Z") for t in timestamps]
+
+
+@app.command()
+def run(
+    max_records: int = 100_000,
+    max_scalar_records: int = 10_000,
+    start_date: str = "2022-06-01",
+    end_date: str = "2022-06-30",
+):
+    """Compares the scalar and vectorised submission window filters on synthetic repo records."""
+    num_records = 1_000
+    while num_records <= max_records:
+        check_times = make_timestamps(num_records)
+
+        start = time.perf_counter()
+        mask = is_time_between_batch(start_date, end_date, check_times)
+        batch_seconds = time.perf_counter() - start
+        message = f"{num_records:>8} records | vectorised: {batch_seconds * 1000:9.2f} ms"
+
+        # The scalar filter is too slow to run on the largest inputs
+        if num_records <= max_scalar_records:
+            start = time.perf_counter()
+            expected = [is_time_between(start_date, end_date, t) for t in check_times]
+            scalar_seconds = time.perf_counter() - start
+            if mask.tolist() != expected:
+                raise ValueError("The scalar and vectorised filters disagree!")
+            message += f" | scalar: {scalar_seconds * 1000:9.2f} ms | speedup: {scalar_seconds / batch_seconds:7.1f}x"
+
+        typer.echo(message)
+        num_records *= 10
+
+
+if __name__ == "__main__":
+    app()
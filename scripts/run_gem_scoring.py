@@ -1,15 +1,31 @@
 import os
 import shutil
-import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import Dict, Union
 
-import numpy as np
+import pandas as pd
 import requests
 import typer
 from dotenv import load_dotenv
-from huggingface_hub import Repository, cached_download, hf_hub_url
-
-from hf_benchmarks import get_benchmark_repos, get_model_index, load_json, save_json
+from huggingface_hub import cached_download, hf_hub_url
+
+from hf_benchmarks import (
+    ZipMember,
+    download_repo_files,
+    get_benchmark_repos_by_type,
+    get_model_index,
+    list_zip_members,
+    load_zip_json,
+    push_changed_files,
+    round_scores,
+    save_json,
+    save_scores_table,
+    scores_to_table,
+    sync_repo_file,
+    table_to_scores,
+    update_zip,
+)
+from hf_benchmarks.file_utils import HF_BENCHMARKS_CACHE
 
 
 if Path(".env").is_file():
@@ -17,11 +33,16 @@ if Path(".env").is_file():
 
 auth_token = os.getenv("HF_GEM_TOKEN")
 
-SCORES_REPO_URL = "https://huggingface.co/datasets/GEM-submissions/submission-scores"
-OUTPUTS_REPO_URL = "https://huggingface.co/datasets/GEM-submissions/v2-outputs-and-scores"
-LOCAL_SCORES_REPO = "data/submission-scores"
-LOCAL_OUTPUTS_REPO = "data/v2-outputs-and-scores"
-LOCAL_GEM_V1_PATH = "data/gem-v1-outputs-and-scores"
+SCORES_REPO_ID = "GEM-submissions/submission-scores"
+OUTPUTS_REPO_ID = "GEM-submissions/v2-outputs-and-scores"
+LOCAL_SCORES_DIR = "data/submission-scores"
+GEM_V2_ARCHIVE_NAME = "gem-v2-outputs-and-scores.zip"
+# The directory of the submissions in the v1 archive
+GEM_V1_DIR = "gem-v1-outputs-and-scores"
+GEM_V2_OUTPUTS_CACHE = HF_BENCHMARKS_CACHE / "gem-v2-outputs"
+# The archive is kept between runs, so that it is only downloaded again when the Hub has a different version
+GEM_V2_ARCHIVE = HF_BENCHMARKS_CACHE / GEM_V2_ARCHIVE_NAME
+GEM_V2_ARCHIVE_MANIFEST = HF_BENCHMARKS_CACHE / f"{GEM_V2_ARCHIVE_NAME}.manifest.json"
 # This file is used to configure the filtering of the raw submissions and also used to configure the GEM website
 EVAL_CONFIG_URL = (
     "https://raw.githubusercontent.com/GEM-benchmark/GEM-benchmark.github.io/main/web/results/eval_config.json"
@@ -38,42 +59,11 @@ def extract_relevant_metrics(config: dict):
     return metric_names
 
 
-def drop_unnecessary_metrics(submission_scores: dict, list_of_metrics: list):
-    """Return submission_scores with every metric not in list_of_metrics removed."""
-    for data_name, data in submission_scores.items():
-        if data_name in ["param_count", "submission_name"]:
-            continue
-        filtered_scores = {k: v for k, v in data.items() if k in list_of_metrics}
-        submission_scores[data_name] = filtered_scores
-    return submission_scores
-
-
-def _round_subelements(v):
-    """traverses object and rounds items."""
-    if isinstance(v, float):
-        return round(v, 3)
-    elif isinstance(v, int) or isinstance(v, str):
-        return v
-    elif isinstance(v, dict):
-        return {k: (round(d, 3) if isinstance(d, float) else d) for k, d in v.items()}
-    else:
-        raise ValueError(f"unexpected type: {type(v)}: {v}.")
-
-
-def round_results(submission_scores: dict):
-    """rounds every metric result to three decimal places."""
-    for data_name, data in submission_scores.items():
-        if data_name in ["param_count", "submission_name"]:
-            continue
-        rounded_scores = {k: _round_subelements(v) for k, v in data.items()}
-        submission_scores[data_name] = rounded_scores
-    return submission_scores
-
-
-def filter_submission_output(submission_scores: dict, config: dict):
+def filter_submission_output(scores_table: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Keeps the metrics of the config in a table of scores, rounded to three decimal places."""
     relevant_metrics = extract_relevant_metrics(config)
-    filtered_scores = [drop_unnecessary_metrics(d, relevant_metrics) for d in submission_scores]
-    return [round_results(d) for d in filtered_scores]
+    is_relevant = scores_table["metric"].isna() | scores_table["metric"].isin(relevant_metrics)
+    return round_scores(scores_table[is_relevant])
 
 
 @app.command()
@@ -83,110 +73,114 @@ def run():
         "GEM-submissions/v1-outputs-and-scores", filename="gem-v1-outputs-and-scores.zip", repo_type="dataset"
     )
     gem_v1_path = cached_download(gem_v1_url)
-    # Load the submissions from v1
-    with zipfile.ZipFile(gem_v1_path) as zf:
-        zf.extractall("data")
-
-    gem_v1_files = [p for p in Path(LOCAL_GEM_V1_PATH).glob("*.scores.json")]
-    gem_v1_submissions = [load_json(p) for p in gem_v1_files]
+    # Load the submissions from v1 straight from the archive, without extracting it
+    gem_v1_submissions = list(load_zip_json(gem_v1_path, f"{GEM_V1_DIR}/*.scores.json").values())
     typer.echo(f"Number of submissions from version 1 of the benchmark: {len(gem_v1_submissions)}")
-    # Some fields have NaNs which breaks the frontend - replace with -999 as a workaround
-    gem_v1_scores = []
-    for scores in gem_v1_submissions:
-        for k, v in scores.items():
-            if isinstance(v, dict):
-                for kk, vv in v.items():
-                    if "msttr" in kk and np.isnan(vv):
-                        scores[k][kk] = -999
-        gem_v1_scores.append(scores)
     # Download submission metadata from the Hub and combine with v1 scores
-    hub_submissions = get_benchmark_repos(benchmark="gem", repo_type="evaluation", use_auth_token=auth_token)
+    # The evaluation and prediction repos are both fetched from a single Hub listing
+    gem_repos = get_benchmark_repos_by_type(benchmark="gem", use_auth_token=auth_token)
+    hub_submissions = gem_repos["evaluation"]
     # Filter out the test submissions
     hub_submissions = [sub for sub in hub_submissions if "lewtun" not in sub.id]
-    all_scores = get_model_index(hub_submissions)
-    all_scores.extend(gem_v1_scores)
-    typer.echo(f"Number of raw scores: {len(all_scores)}")
-    # Clone the Hub repo with the scores
-    scores_repo = Repository(
-        local_dir=LOCAL_SCORES_REPO,
-        clone_from=SCORES_REPO_URL,
-        repo_type="dataset",
-        use_auth_token=auth_token,
+    gem_v2_scores = get_model_index(hub_submissions)
+    # One row per submission, dataset and metric
+    scores_table = scores_to_table(gem_v2_scores + gem_v1_submissions)
+    # Some fields of the v1 submissions have NaNs which breaks the frontend - replace with -999 as a workaround
+    is_nan_msttr = (
+        (scores_table["submission"] >= len(gem_v2_scores))
+        & scores_table["metric"].str.contains("msttr", na=False)
+        & scores_table["key"].isna()
+        & scores_table["is_score"]
+        & scores_table["score"].isna()
     )
+    scores_table.loc[is_nan_msttr, ["value", "is_score"]] = [-999, False]
+    all_scores = table_to_scores(scores_table)
+    typer.echo(f"Number of raw scores: {len(all_scores)}")
     # Filter the scores for smaller payload to the website / Spaces
     eval_config = requests.get(EVAL_CONFIG_URL).json()
-    filtered_scores = filter_submission_output(all_scores, eval_config)
+    filtered_table = filter_submission_output(scores_table, eval_config)
+    filtered_scores = table_to_scores(filtered_table)
     typer.echo(f"Number of filtered scores: {len(filtered_scores)}")
     if len(all_scores) != len(filtered_scores):
         raise ValueError("The raw and filtered scores must have the same count!")
-    # Save and update the raw and filtered scores
-    save_json(f"{LOCAL_SCORES_REPO}/scores.json", all_scores)
-    save_json(f"{LOCAL_SCORES_REPO}/filtered_scores.json", filtered_scores)
-
-    if scores_repo.is_repo_clean():
+    # Save and update the scores. Like the filtered scores, the published `scores.json` only has the relevant metrics,
+    # rounded, since the website reads both files
+    save_json(f"{LOCAL_SCORES_DIR}/scores.json", filtered_scores)
+    save_json(f"{LOCAL_SCORES_DIR}/filtered_scores.json", filtered_scores)
+    save_scores_table(filtered_table, f"{LOCAL_SCORES_DIR}/filtered_scores.parquet")
+    # Only the files that differ from the Hub are uploaded, in a single commit
+    scores_files = {
+        filename: Path(LOCAL_SCORES_DIR) / filename
+        for filename in ["scores.json", "filtered_scores.json", "filtered_scores.parquet"]
+    }
+    pushed_files = push_changed_files(
+        SCORES_REPO_ID, scores_files, "Update submission scores", use_auth_token=auth_token
+    )
+    if len(pushed_files) == 0:
         typer.echo("No new submissions were found! Skipping update to the scores repo ...")
     else:
-        scores_repo.git_add()
-        typer.echo("Pushing scores and outputs to the hub ...")
-        scores_repo.push_to_hub("Update submission scores")
+        typer.echo(f"Pushed {', '.join(pushed_files)} to the scores repo")
 
     # Dumping all scores and outputs - refactor this!
-    # Clone the Hub repo with the scores
-    outputs_repo = Repository(
-        local_dir=LOCAL_OUTPUTS_REPO,
-        clone_from=OUTPUTS_REPO_URL,
-        repo_type="dataset",
-        use_auth_token=auth_token,
-    )
-
-    # Load the submissions from v1
-    gem_v1_scores_files = [p for p in Path(LOCAL_GEM_V1_PATH).glob("*.scores.json")]
-    gem_v1_outputs_files = [p for p in Path(LOCAL_GEM_V1_PATH).glob("*.outputs.json")]
-    # Load scores from v2
-    gem_v2_scores = get_model_index(hub_submissions)
+    # Start from the archive on the Hub, so that only new and changed files are compressed
+    if sync_repo_file(OUTPUTS_REPO_ID, GEM_V2_ARCHIVE_NAME, GEM_V2_ARCHIVE, use_auth_token=auth_token):
+        typer.echo("Downloaded the outputs archive from the Hub")
+
+    # The submissions from v1 are copied from their archive into the new one as they are
+    gem_v1_scores_members = list_zip_members(gem_v1_path, f"{GEM_V1_DIR}/*.scores.json")
+    gem_v1_outputs_members = list_zip_members(gem_v1_path, f"{GEM_V1_DIR}/*.outputs.json")
+    # Save the scores from v2, filtered and rounded like in `scores.json`. The v2 submissions come first in the table
     scores_submission_names = []
     gem_v2_scores_files = []
-    for score in gem_v2_scores:
+    for score in filtered_scores[: len(gem_v2_scores)]:
         submission_name = score["submission_name"]
         scores_submission_names.append(submission_name)
         filename = f"data/tmp/{submission_name}.scores.json"
         gem_v2_scores_files.append(Path(f"data/tmp/{submission_name}.scores.json"))
         save_json(filename, score)
 
-    gem_v2_outputs = get_benchmark_repos("gem", use_auth_token=auth_token)
+    gem_v2_outputs = gem_repos["prediction"]
     gem_v2_outputs = [s for s in gem_v2_outputs if "lewtun" not in s.id]
-    gem_v2_outputs_files = []
-
-    for submission in gem_v2_outputs:
-        card_data = submission.cardData
-        submission_name = card_data["submission_name"]
-        if submission_name in scores_submission_names:
-            url = hf_hub_url(submission.id, "submission.json", repo_type="dataset")
-            cache_filepath = cached_download(
-                url, cache_dir="data/tmp/", force_filename=f"{submission_name}.outputs.json"
-            )
-            gem_v2_outputs_files.append(Path(cache_filepath))
-
-    with zipfile.ZipFile(f"{LOCAL_OUTPUTS_REPO}/gem-v2-outputs-and-scores.zip", "w") as f:
-        for path in gem_v1_scores_files:
-            f.write(path, path.relative_to("data/gem-v1-outputs-and-scores"), compress_type=zipfile.ZIP_DEFLATED)
-        for path in gem_v1_outputs_files:
-            f.write(path, path.relative_to("data/gem-v1-outputs-and-scores"), compress_type=zipfile.ZIP_DEFLATED)
-        for path in gem_v2_outputs_files:
-            f.write(path, path.relative_to("data/tmp"), compress_type=zipfile.ZIP_DEFLATED)
-        for path in gem_v2_scores_files:
-            f.write(path, path.relative_to("data/tmp"), compress_type=zipfile.ZIP_DEFLATED)
-
-    if outputs_repo.is_repo_clean():
+    # Only download the outputs of submissions that have scores
+    scored_names = set(scores_submission_names)
+    gem_v2_outputs = [s for s in gem_v2_outputs if s.cardData["submission_name"] in scored_names]
+    # The outputs are cached by commit SHA, so only new or updated submissions are downloaded
+    downloaded_files = download_repo_files(
+        gem_v2_outputs, "submission.json", cache_dir=GEM_V2_OUTPUTS_CACHE, use_auth_token=auth_token
+    )
+    gem_v2_outputs_files = {
+        f"{submission.cardData['submission_name']}.outputs.json": downloaded_files[submission.id]
+        for submission in gem_v2_outputs
+    }
+
+    archive_files: Dict[str, Union[Path, ZipMember]] = {}
+    for member in gem_v1_scores_members + gem_v1_outputs_members:
+        archive_files[str(PurePosixPath(member.name).relative_to(GEM_V1_DIR))] = member
+    archive_files.update(gem_v2_outputs_files)
+    for path in gem_v2_scores_files:
+        archive_files[str(path.relative_to("data/tmp"))] = path
+    # Only the new and changed files are compressed, the other members are copied from the previous and v1 archives
+    stats = update_zip(
+        GEM_V2_ARCHIVE,
+        archive_files,
+        manifest_path=GEM_V2_ARCHIVE_MANIFEST,
+        workers=os.cpu_count() or 1,
+    )
+    typer.echo(
+        f"Updated the outputs archive: {stats['compressed']} files compressed, {stats['copied']} copied as they are "
+        f"and {stats['removed']} removed"
+    )
+
+    pushed_files = push_changed_files(
+        OUTPUTS_REPO_ID, {GEM_V2_ARCHIVE_NAME: GEM_V2_ARCHIVE}, "Update scores and outputs", use_auth_token=auth_token
+    )
+    if len(pushed_files) == 0:
         typer.echo("No new outputs were found! Skipping update to the outputs repo ...")
     else:
-        outputs_repo.git_add()
-        typer.echo("Pushing scores and outputs to the hub ...")
-        outputs_repo.push_to_hub("Update scores and outputs")
+        typer.echo("Pushed the scores and outputs to the outputs repo")
 
-    # Flush local repos
-    shutil.rmtree(LOCAL_SCORES_REPO, ignore_errors=True)
-    shutil.rmtree(LOCAL_OUTPUTS_REPO, ignore_errors=True)
+    # Flush local files
+    shutil.rmtree(LOCAL_SCORES_DIR, ignore_errors=True)
 
 
 if __name__ == "__main__":
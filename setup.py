@@ -63,6 +63,7 @@ REQUIRED_PKGS = [
     "evaluate==0.1.2",
     "scikit-learn==1.1.1",
     "huggingface-hub==0.10.1",
+    "filelock",
 ]
 
 QUALITY_REQUIRE = ["black", "flake8", "isort", "pyyaml>=5.3.1", "mypy", "types-requests"]
@@ -99,6 +100,7 @@ setup(
     packages=find_packages("src"),
     install_requires=REQUIRED_PKGS,
     extras_require=EXTRAS_REQUIRE,
+    entry_points={"console_scripts": ["hf-benchmarks=hf_benchmarks.cli:app"]},
     classifiers=[
         "Development Status :: 1 - Planning",
         "Intended Audience :: Developers",
@@ -1,3 +1,88 @@
-from .file_utils import load_json, save_json
-from .hub import get_benchmark_repos, get_model_index, http_get, http_post
-from .schemas import Evaluation, Metric, Result, Task
+import importlib
+from typing import TYPE_CHECKING
+
+
+# The public attributes of each submodule. Submodules are only imported when one of their attributes is first
+# accessed (PEP 562), so that e.g. `from hf_benchmarks import load_json` does not import pandas or huggingface_hub
+_import_structure = {
+    "alignment": ["AlignmentError", "align_by_id", "align_predictions", "read_columns"],
+    "batch": ["run_batch"],
+    "cache": ["ListingCache"],
+    "file_utils": [
+        "ZipMember",
+        "list_zip_members",
+        "load_json",
+        "load_zip_json",
+        "save_json",
+        "save_jsonl",
+        "update_zip",
+    ],
+    "hub": [
+        "AutoTrainClient",
+        "ProjectStatusPoller",
+        "UnreachableAPIError",
+        "download_repo_files",
+        "get_autotrain_client",
+        "get_benchmark_repos",
+        "get_benchmark_repos_by_type",
+        "get_model_index",
+        "get_repo_file_hashes",
+        "http_get",
+        "http_post",
+        "is_time_between",
+        "is_time_between_batch",
+        "iter_benchmark_repos",
+        "push_changed_files",
+        "sync_repo_file",
+    ],
+    "metrics": ["get_metric", "warm_metrics"],
+    "schemas": ["Evaluation", "Metric", "Result", "SubmissionResult", "Task"],
+    "scores": ["round_scores", "save_scores_table", "scores_to_table", "table_to_scores"],
+    "state": ["SubmissionStateStore"],
+}
+
+_attribute_to_submodule = {name: submodule for submodule, names in _import_structure.items() for name in names}
+
+__all__ = list(_attribute_to_submodule)
+
+
+if TYPE_CHECKING:
+    from .alignment import AlignmentError, align_by_id, align_predictions, read_columns
+    from .batch import run_batch
+    from .cache import ListingCache
+    from .file_utils import ZipMember, list_zip_members, load_json, load_zip_json, save_json, save_jsonl, update_zip
+    from .hub import (
+        AutoTrainClient,
+        ProjectStatusPoller,
+        UnreachableAPIError,
+        download_repo_files,
+        get_autotrain_client,
+        get_benchmark_repos,
+        get_benchmark_repos_by_type,
+        get_model_index,
+        get_repo_file_hashes,
+        http_get,
+        http_post,
+        is_time_between,
+        is_time_between_batch,
+        iter_benchmark_repos,
+        push_changed_files,
+        sync_repo_file,
+    )
+    from .metrics import get_metric, warm_metrics
+    from .schemas import Evaluation, Metric, Result, SubmissionResult, Task
+    from .scores import round_scores, save_scores_table, scores_to_table, table_to_scores
+    from .state import SubmissionStateStore
+
+
+def __getattr__(name: str):
+    if name not in _attribute_to_submodule:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_attribute_to_submodule[name]}", __name__), name)
+    # Cache the attribute, so that later accesses do not go through `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,109 @@
+import warnings
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+
+class AlignmentError(ValueError):
+    """Raised when the rows of a submission cannot be matched one-to-one with the rows of the references."""
+
+    def __init__(self, message: str, missing_ids: Optional[list] = None, duplicate_ids: Optional[list] = None):
+        super().__init__(message)
+        self.missing_ids = missing_ids or []
+        self.duplicate_ids = duplicate_ids or []
+
+
+def read_columns(dataset: "Dataset", columns: List[str]) -> Dict[str, np.ndarray]:
+    """Reads some columns of a dataset as NumPy arrays, without decoding the other columns.
+
+    Args:
+        dataset: The dataset to read, e.g. as returned by `datasets.load_dataset`.
+        columns: The names of the columns to read.
+
+    Returns:
+        A mapping from column name to the values of the column, in the order of the dataset rows.
+    """
+    dataset = dataset.with_format("numpy", columns=columns)
+    return {column: dataset[column] for column in columns}
+
+
+def align_by_id(reference_ids: np.ndarray, submission_ids: np.ndarray) -> np.ndarray:
+    """Matches the rows of a submission with the rows of the references by ID.
+
+    The submission IDs are sorted once and every reference ID is looked up with a binary search, so no Python-level
+    loop over the rows is needed. IDs of the submission that are not in the references are ignored with a warning.
+
+    Args:
+        reference_ids: The unique IDs of the reference rows.
+        submission_ids: The IDs of the submission rows.
+
+    Returns:
+        The positions of the submission rows in the order of the reference rows, i.e. `submission_labels[positions]`
+        are the predictions for the reference rows.
+
+    Raises:
+        AlignmentError: If the submission contains duplicate IDs or is missing some of the reference IDs.
+    """
+    reference_ids, submission_ids = np.asarray(reference_ids), np.asarray(submission_ids)
+    order = np.argsort(submission_ids, kind="stable")
+    sorted_ids = submission_ids[order]
+    duplicate_ids = np.unique(sorted_ids[1:][sorted_ids[1:] == sorted_ids[:-1]])
+    if len(duplicate_ids) > 0:
+        raise AlignmentError(
+            f"The submission contains {len(duplicate_ids)} duplicate IDs, e.g. {duplicate_ids[:5].tolist()}",
+            duplicate_ids=duplicate_ids.tolist(),
+        )
+
+    if len(sorted_ids) == 0:
+        positions = np.zeros(len(reference_ids), dtype=np.intp)
+        found = np.zeros(len(reference_ids), dtype=bool)
+    else:
+        # Reference IDs beyond the largest submission ID are clipped to a valid position and caught as missing below
+        positions = np.minimum(np.searchsorted(sorted_ids, reference_ids), len(sorted_ids) - 1)
+        found = sorted_ids[positions] == reference_ids
+    missing_ids = reference_ids[~found]
+    if len(missing_ids) > 0:
+        raise AlignmentError(
+            f"The submission is missing {len(missing_ids)} IDs, e.g. {missing_ids[:5].tolist()}",
+            missing_ids=missing_ids.tolist(),
+        )
+    num_extra_ids = len(submission_ids) - len(reference_ids)
+    if num_extra_ids > 0:
+        warnings.warn(f"Ignoring {num_extra_ids} IDs in the submission that are not in the references")
+
+    return order[positions]
+
+
+def align_predictions(
+    references: Dict[str, np.ndarray], submission: "Dataset", label_column: str, id_column: Optional[str] = None
+) -> np.ndarray:
+    """Reads the predictions of a submission in the order of the reference rows.
+
+    Args:
+        references: The reference columns, as returned by `read_columns`.
+        submission: The submission dataset.
+        label_column: The name of the column with the predictions in the submission.
+        id_column: The name of the ID column. If it is not set, or missing from the references or the submission, the
+            rows are matched by position instead.
+
+    Returns:
+        The predictions, aligned with `references[label_column]`.
+
+    Raises:
+        AlignmentError: If the rows of the submission cannot be matched with the reference rows.
+    """
+    if id_column is None or id_column not in references or id_column not in submission.column_names:
+        predictions = read_columns(submission, [label_column])[label_column]
+        if len(predictions) != len(references[label_column]):
+            raise AlignmentError(
+                f"The submission has {len(predictions)} rows but the references have {len(references[label_column])}"
+            )
+        return predictions
+
+    columns = read_columns(submission, [id_column, label_column])
+    positions = align_by_id(references[id_column], columns[id_column])
+    return columns[label_column][positions]
@@ -0,0 +1,73 @@
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from .metrics import warm_metrics
+from .schemas import SubmissionResult
+
+
+# References shared by all the submissions scored in a worker process, set once when the worker starts
+_references: Any = None
+
+
+def _init_worker(references: Any, metrics: Sequence[str]) -> None:
+    global _references
+    _references = references
+    warm_metrics(metrics)
+
+
+def _score(score_fn: Callable[[Any, Any], Any], submission: Any) -> Any:
+    return score_fn(_references, submission)
+
+
+def _to_result(submission: Any, evaluation: Any = None, error: Optional[BaseException] = None) -> SubmissionResult:
+    if error is None:
+        return SubmissionResult(submission=submission, evaluation=evaluation, error=None)
+    message = "".join(traceback.format_exception_only(type(error), error)).strip()
+    return SubmissionResult(submission=submission, evaluation=None, error=message)
+
+
+def run_batch(
+    score_fn: Callable[[Any, Any], Any],
+    references: Any,
+    submissions: Sequence,
+    workers: Optional[int] = None,
+    metrics: Sequence[str] = (),
+) -> List[SubmissionResult]:
+    """Scores many submissions against the same references in a process pool.
+
+    The references are sent once to each worker process rather than once per submission. A failing submission does
+    not affect the others: its error is reported in its result instead.
+
+    Args:
+        score_fn: A picklable function called as `score_fn(references, submission)` that returns the evaluation of a
+            submission, e.g. a module-level function or a `functools.partial` of one.
+        references: The references loaded once for all submissions, e.g. the ground truth labels.
+        submissions: The submissions to score.
+        workers: The number of worker processes. Defaults to the number of CPUs, while `workers=1` scores the
+            submissions in the current process.
+        metrics: The names of the metrics used by `score_fn`, loaded with `get_metric` when each worker starts.
+
+    Returns:
+        The results of the submissions, in the same order as `submissions`.
+    """
+    results = []
+    if workers == 1:
+        warm_metrics(metrics)
+        for submission in submissions:
+            try:
+                results.append(_to_result(submission, evaluation=score_fn(references, submission)))
+            except Exception as e:
+                results.append(_to_result(submission, error=e))
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(references, metrics)
+    ) as executor:
+        futures = [executor.submit(_score, score_fn, submission) for submission in submissions]
+        for submission, future in zip(submissions, futures):
+            try:
+                results.append(_to_result(submission, evaluation=future.result()))
+            except Exception as e:
+                results.append(_to_result(submission, error=e))
+    return results
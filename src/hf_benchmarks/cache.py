@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from filelock import FileLock
+
+from .file_utils import HF_BENCHMARKS_CACHE
+
+
+class ListingCache:
+    """On-disk cache of Hub listings, shared across processes.
+
+    Entries are keyed by the listing filter and by the scope of the token used to list, so that private repos listed
+    with one token are never served to another. Reads and writes are guarded by file locks, so concurrent pipelines
+    can share the same cache directory.
+
+    Args:
+        cache_dir: The directory where listings are stored. Defaults to `listings` in the `HF_BENCHMARKS_CACHE`
+            directory.
+        ttl: The number of seconds after which a cached listing is considered stale.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = None, ttl: float = 600):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else HF_BENCHMARKS_CACHE / "listings"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    @staticmethod
+    def _auth_scope(use_auth_token: Union[bool, str, None]) -> str:
+        if use_auth_token is False:
+            token = None
+        elif isinstance(use_auth_token, str):
+            token = use_auth_token
+        else:
+            from huggingface_hub import HfFolder
+
+            token = HfFolder.get_token()
+        # Never store the token itself on disk
+        return hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+
+    @staticmethod
+    def _filter_name(filter: str) -> str:
+        return re.sub(r"[^\w.-]", "_", filter)
+
+    def _path(self, filter: str, use_auth_token: Union[bool, str, None]) -> Path:
+        return self.cache_dir / f"{self._filter_name(filter)}--{self._auth_scope(use_auth_token)}.json"
+
+    def get(self, filter: str, use_auth_token: Union[bool, str, None] = None) -> Optional[List[Dict]]:
+        """Returns the cached listing, or None if it is missing or stale."""
+        path = self._path(filter, use_auth_token)
+        with FileLock(f"{path}.lock"):
+            if not path.is_file():
+                return None
+            with open(path, "r") as f:
+                entry = json.load(f)
+        if entry["filter"] != filter or time.time() - entry["created_at"] > self.ttl:
+            return None
+        return entry["datasets"]
+
+    def set(self, filter: str, use_auth_token: Union[bool, str, None], datasets: List[Dict]) -> None:
+        """Stores a listing, replacing any previous entry."""
+        path = self._path(filter, use_auth_token)
+        entry = {"filter": filter, "created_at": time.time(), "datasets": datasets}
+        with FileLock(f"{path}.lock"):
+            # Write to a temporary file first so that readers never see a partial entry
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+    def invalidate(self, filter: str = None) -> None:
+        """Removes the cached listings for `filter` under every auth scope, or all listings if `filter` is not given."""
+        pattern = f"{self._filter_name(filter)}--*.json" if filter is not None else "*.json"
+        for path in self.cache_dir.glob(pattern):
+            with FileLock(f"{path}.lock"):
+                path.unlink(missing_ok=True)
@@ -0,0 +1,127 @@
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+
+from .batch import run_batch
+from .file_utils import save_jsonl
+from .hub import get_benchmark_repos
+from .schemas import SubmissionResult
+
+
+app = typer.Typer(help="Hugging Face Benchmarks command line interface.")
+
+
+@app.callback()
+def main():
+    pass
+
+
+def _get_benchmark(name: str):
+    # The benchmarks live in the `benchmarks` directory at the root of the repository, which is not installed with
+    # the package, so they are imported from the working directory like `python -m` would
+    cwd = os.getcwd()
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+    try:
+        from benchmarks import registry
+    except ModuleNotFoundError as e:
+        if e.name != "benchmarks":
+            raise
+        raise typer.BadParameter("run the command from the root of the hf_benchmarks repository") from e
+    try:
+        return registry.get_benchmark(name)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="BENCHMARK") from e
+
+
+def _check_submission_fields(benchmark) -> None:
+    # Submissions are only identified by their dataset here, so benchmarks that need more to find a submission, e.g.
+    # the user and submission IDs of a competition entry, cannot be driven from the command line
+    if benchmark.submission_fields:
+        raise typer.BadParameter(
+            f"benchmark {benchmark.name} needs the {', '.join(benchmark.submission_fields)} of each submission, "
+            "which cannot be inferred from the submission datasets",
+            param_hint="BENCHMARK",
+        )
+
+
+def _compute_metrics(
+    evaluation_dataset: str, submission: Dict[str, str], benchmark: str, use_auth_token: Optional[str]
+):
+    return _get_benchmark(benchmark).compute_metrics(evaluation_dataset, use_auth_token=use_auth_token, **submission)
+
+
+def evaluate_submissions(
+    benchmark: str,
+    evaluation_dataset: str,
+    submissions: List[str],
+    use_auth_token: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> List[SubmissionResult]:
+    """Scores many submissions to a registered benchmark locally, in a process pool.
+
+    Benchmarks that support batch evaluation load their references once for all the submissions, while the others
+    are scored with one `compute_metrics` call per submission. Benchmarks that identify submissions by more than their
+    dataset, i.e. that have `submission_fields`, are not supported.
+
+    Args:
+        benchmark: The name of the registered benchmark.
+        evaluation_dataset: The name of the dataset with the ground truth labels.
+        submissions: The names of the submission datasets.
+        use_auth_token: The authentication token for the Hugging Face Hub
+        workers: The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        The evaluation or error of each submission, in the same order as `submissions`.
+
+    Raises:
+        typer.BadParameter: If the benchmark is not registered or has `submission_fields`.
+    """
+    registered_benchmark = _get_benchmark(benchmark)
+    _check_submission_fields(registered_benchmark)
+    batch = [{"submission_dataset": submission} for submission in submissions]
+    if registered_benchmark.batch:
+        return registered_benchmark.compute_metrics_batch(evaluation_dataset, batch, use_auth_token, workers)
+    score_fn = partial(_compute_metrics, benchmark=benchmark, use_auth_token=use_auth_token)
+    return run_batch(score_fn, evaluation_dataset, batch, workers)
+
+
+@app.command()
+def evaluate(
+    benchmark: str = typer.Argument(..., help="Name of the registered benchmark."),
+    evaluation_dataset: str = typer.Option(..., help="Name of the dataset with the ground truth labels."),
+    output: Optional[Path] = typer.Option(None, help="Path of the JSONL results. Defaults to BENCHMARK.jsonl."),
+    start_date: Optional[str] = typer.Option(None, help="Start of the submission window."),
+    end_date: Optional[str] = typer.Option(None, help="End of the submission window."),
+    workers: Optional[int] = typer.Option(None, help="Number of worker processes. Defaults to the number of CPUs."),
+    use_auth_token: Optional[str] = typer.Option(None, envvar="HF_TOKEN", help="Hugging Face Hub token."),
+):
+    """Evaluates the submissions to a benchmark locally and writes one JSON result per line."""
+    # Fail before listing the submissions if the benchmark is unknown or cannot be evaluated here
+    _check_submission_fields(_get_benchmark(benchmark))
+    submissions = get_benchmark_repos(
+        benchmark, use_auth_token=use_auth_token, start_date=start_date, end_date=end_date
+    )
+    typer.echo(f"Found {len(submissions)} submissions to evaluate on benchmark {benchmark}")
+    results = evaluate_submissions(
+        benchmark, evaluation_dataset, [s.id for s in submissions], use_auth_token=use_auth_token, workers=workers
+    )
+    rows = [
+        {
+            "benchmark": benchmark,
+            "submission": submission.id,
+            "submission_name": submission.cardData.get("submission_name"),
+            "sha": submission.sha,
+            "evaluation": result["evaluation"],
+            "error": result["error"],
+        }
+        for submission, result in zip(submissions, results)
+    ]
+    output = output or Path(f"{benchmark}.jsonl")
+    save_jsonl(output, rows)
+    num_errors = sum(result["error"] is not None for result in results)
+    typer.echo(f"Evaluated {len(results) - num_errors} submissions with {num_errors} errors, saved to {output}")
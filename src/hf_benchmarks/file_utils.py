@@ -1,5 +1,25 @@
+import fnmatch
+import hashlib
+import itertools
 import json
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Union, cast
+
+
+HF_BENCHMARKS_CACHE = Path(os.getenv("HF_BENCHMARKS_CACHE", Path.home() / ".cache" / "hf_benchmarks"))
+
+_CHUNK_SIZE = 1024 * 1024
 
 
 def load_json(path):
@@ -11,3 +31,279 @@ def save_json(path, data):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f)
+
+
+def save_jsonl(path, rows):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+@dataclass(frozen=True)
+class ZipMember:
+    """A member of a zip archive, e.g. to add it to another archive with `update_zip` without extracting it.
+
+    Args:
+        archive_path: The path of the archive.
+        name: The name of the member in the archive.
+    """
+
+    archive_path: Path
+    name: str
+
+
+def _match_member(name: str, pattern: str) -> bool:
+    # Like `Path.glob`, wildcards only match within a directory, so e.g. `gem-v1/*.json` skips `gem-v1/sub/a.json`
+    parts, pattern_parts = name.split("/"), pattern.split("/")
+    return (
+        not name.endswith("/")
+        and len(parts) == len(pattern_parts)
+        and all(fnmatch.fnmatchcase(part, pattern_part) for part, pattern_part in zip(parts, pattern_parts))
+    )
+
+
+def list_zip_members(archive_path: Union[str, Path], pattern: str = "*") -> List[ZipMember]:
+    """Lists the files of a zip archive whose name matches the glob `pattern`, in archive order."""
+    with zipfile.ZipFile(archive_path) as zf:
+        names = [name for name in zf.namelist() if _match_member(name, pattern)]
+    return [ZipMember(Path(archive_path), name) for name in names]
+
+
+def load_zip_json(archive_path: Union[str, Path], pattern: str = "*.json") -> Dict[str, Any]:
+    """Parses the JSON members of a zip archive whose name matches the glob `pattern`, without extracting them.
+
+    Args:
+        archive_path: The path of the archive.
+        pattern: The glob pattern of the member names, e.g. `gem-v1/*.scores.json`. Like `Path.glob`, wildcards do not
+            match `/`.
+
+    Returns:
+        A mapping from member name to parsed content, in archive order.
+    """
+    data = {}
+    with zipfile.ZipFile(archive_path) as zf:
+        for name in zf.namelist():
+            if _match_member(name, pattern):
+                with zf.open(name) as f:
+                    data[name] = json.load(f)
+    return data
+
+
+def _hash_file(path: Path) -> Dict[str, Any]:
+    sha256 = hashlib.sha256()
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+    return {"sha256": sha256.hexdigest(), "crc": crc, "size": path.stat().st_size}
+
+
+def _compress_bytes(data: bytes, compresslevel: int) -> bytes:
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_file(path: Path, compresslevel: int) -> bytes:
+    # Raw DEFLATE stream, as stored in zip archives. zlib releases the GIL, so files are compressed on several cores
+    # when this runs in a thread pool.
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    chunks = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            chunks.append(compressor.compress(chunk))
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def _map_ahead(executor: Executor, fn: Callable, items: Iterable, ahead: int) -> Iterator:
+    """Like `executor.map`, but only submits up to `ahead` calls before their results are consumed, in order."""
+    items = iter(items)
+    pending = deque(executor.submit(fn, item) for item in itertools.islice(items, ahead))
+
+    def results():
+        while pending:
+            future = pending.popleft()
+            # Top up the window before blocking, so the workers stay busy while the consumer handles this result
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(fn, item))
+            yield future.result()
+
+    return results()
+
+
+class _LimitedReader:
+    """Reads at most `size` bytes from the current position of `fp`."""
+
+    def __init__(self, fp: BinaryIO, size: int):
+        self.fp = fp
+        self.remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fp.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _open_raw_member(fp: BinaryIO, zinfo: zipfile.ZipInfo) -> _LimitedReader:
+    """Opens the compressed bytes of a member for reading, skipping its local file header."""
+    fp.seek(zinfo.header_offset)
+    header = fp.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local file header for {zinfo.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    fp.seek(name_length + extra_length, os.SEEK_CUR)
+    return _LimitedReader(fp, zinfo.compress_size)
+
+
+def _write_raw_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, data: Union[bytes, _LimitedReader]) -> None:
+    """Appends an already compressed member, whose CRC and sizes are set in `zinfo`, to an archive open for writing.
+
+    The compressed bytes are either given in memory, or copied in chunks from the member of another archive.
+    """
+    # The CRC and sizes are known up front, so they go in the local header rather than a trailing data descriptor
+    zinfo.flag_bits &= ~0x08
+    fp = cast(BinaryIO, zf.fp)
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader())
+    if isinstance(data, bytes):
+        fp.write(data)
+    else:
+        shutil.copyfileobj(data, fp, _CHUNK_SIZE)
+        if data.remaining:
+            raise zipfile.BadZipFile(f"Truncated member {zinfo.filename}")
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    # Like `ZipFile.write`, so that the central directory is written after this member when the archive is closed
+    zf.start_dir = fp.tell()
+    zf._didModify = True  # type: ignore
+
+
+def _copy_zipinfo(zinfo: zipfile.ZipInfo, filename: Optional[str] = None) -> zipfile.ZipInfo:
+    copy = zipfile.ZipInfo(filename or zinfo.filename, date_time=zinfo.date_time)
+    for attr in ["compress_type", "comment", "create_system", "external_attr", "flag_bits", "CRC"]:
+        setattr(copy, attr, getattr(zinfo, attr))
+    copy.compress_size, copy.file_size = zinfo.compress_size, zinfo.file_size
+    return copy
+
+
+def _is_raw_copyable(zinfo: zipfile.ZipInfo) -> bool:
+    # Encrypted members, or members compressed with another method, are rewritten
+    return not zinfo.flag_bits & 0x01 and zinfo.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+
+def _is_unchanged(file_hash: Dict[str, Any], old_hash: Optional[Dict[str, Any]], zinfo: zipfile.ZipInfo) -> bool:
+    if not _is_raw_copyable(zinfo):
+        return False
+    # The archive may have been replaced since the manifest was written, so the member must also match the manifest
+    if zinfo.CRC != file_hash["crc"] or zinfo.file_size != file_hash["size"]:
+        return False
+    # Without a manifest entry, e.g. on the first incremental run, the CRC and size are trusted
+    return old_hash is None or old_hash["sha256"] == file_hash["sha256"]
+
+
+def update_zip(
+    archive_path: Union[str, Path],
+    files: Mapping[str, Union[str, Path, ZipMember]],
+    manifest_path: Optional[Union[str, Path]] = None,
+    workers: int = 1,
+    compresslevel: int = 6,
+) -> Dict[str, int]:
+    """Updates a zip archive so that it contains exactly `files`, only compressing the files that changed.
+
+    The content hash of every member is kept in a JSON manifest next to the archive. Members whose file is unchanged
+    are copied byte for byte from the previous archive, without being decompressed or compressed again, while new
+    and changed files are DEFLATE-compressed, in parallel if `workers > 1`. Members of other archives, given as
+    `ZipMember`, are copied byte for byte from their archive, except encrypted members or members compressed with
+    another method than DEFLATE or no compression, which are read into memory and DEFLATE-compressed again. Members
+    of the previous archive that are not in `files` are dropped. The archive is replaced atomically once it is
+    complete.
+
+    Args:
+        archive_path: The path of the archive, which is created if it does not exist.
+        files: Mapping from the name of each member in the archive to the path of its file, or to a member of another
+            archive, in archive order.
+        manifest_path: The path of the manifest. Defaults to the archive path with a `.manifest.json` suffix.
+        workers: The number of threads used to hash and compress the files.
+        compresslevel: The DEFLATE compression level of new and changed files.
+
+    Returns:
+        The number of members that were `copied` without being compressed, `compressed` and `removed`.
+    """
+    archive_path = Path(archive_path)
+    manifest_path = Path(manifest_path) if manifest_path is not None else Path(f"{archive_path}.manifest.json")
+    old_manifest = load_json(manifest_path) if manifest_path.exists() else {}
+    paths = {arcname: Path(path) for arcname, path in files.items() if not isinstance(path, ZipMember)}
+    members = {arcname: member for arcname, member in files.items() if isinstance(member, ZipMember)}
+
+    with ExitStack() as stack, ThreadPoolExecutor(max_workers=workers) as executor:
+        source_zfs: Dict[Path, zipfile.ZipFile] = {}
+        for member in members.values():
+            if member.archive_path not in source_zfs:
+                source_zfs[member.archive_path] = stack.enter_context(zipfile.ZipFile(member.archive_path))
+        member_infos = {arcname: source_zfs[m.archive_path].getinfo(m.name) for arcname, m in members.items()}
+        hashes = dict(zip(paths, executor.map(_hash_file, paths.values())))
+        # Members of other archives are identified by their CRC and size, which are read without decompressing them
+        for arcname, zinfo in member_infos.items():
+            hashes[arcname] = {"sha256": None, "crc": zinfo.CRC, "size": zinfo.file_size}
+
+        old_zf = stack.enter_context(zipfile.ZipFile(archive_path)) if archive_path.exists() else None
+        old_infos = {zinfo.filename: zinfo for zinfo in old_zf.infolist()} if old_zf is not None else {}
+        unchanged = {
+            arcname
+            for arcname, file_hash in hashes.items()
+            if arcname in paths
+            and arcname in old_infos
+            and _is_unchanged(file_hash, old_manifest.get(arcname), old_infos[arcname])
+        }
+        changed = [arcname for arcname in paths if arcname not in unchanged]
+        # Compression starts right away but only runs a couple of files per worker ahead of the writer, which consumes
+        # the results in archive order, so at most that many compressed files are held in memory at once
+        compress = partial(_compress_file, compresslevel=compresslevel)
+        changed_paths = (paths[arcname] for arcname in changed)
+        compressed: Iterator[bytes] = _map_ahead(executor, compress, changed_paths, ahead=2 * workers)
+
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=archive_path.parent, suffix=".zip", delete=False) as tmp:
+            tmp_path = tmp.name
+        stats = {"copied": 0, "compressed": 0}
+        try:
+            with zipfile.ZipFile(tmp_path, "w") as new_zf:
+                for arcname in files:
+                    # Members copied from an archive are streamed in chunks rather than read into memory
+                    data: Union[bytes, _LimitedReader]
+                    if arcname in members and _is_raw_copyable(member_infos[arcname]):
+                        source_zf = source_zfs[members[arcname].archive_path]
+                        zinfo = _copy_zipinfo(member_infos[arcname], filename=arcname)
+                        data = _open_raw_member(cast(BinaryIO, source_zf.fp), member_infos[arcname])
+                        stats["copied"] += 1
+                    elif arcname in members:
+                        source_zf = source_zfs[members[arcname].archive_path]
+                        zinfo = _copy_zipinfo(member_infos[arcname], filename=arcname)
+                        zinfo.compress_type, zinfo.flag_bits = zipfile.ZIP_DEFLATED, 0
+                        data = _compress_bytes(source_zf.read(members[arcname].name), compresslevel)
+                        zinfo.compress_size = len(data)
+                        stats["compressed"] += 1
+                    elif arcname in unchanged:
+                        assert old_zf is not None
+                        zinfo = _copy_zipinfo(old_infos[arcname])
+                        data = _open_raw_member(cast(BinaryIO, old_zf.fp), old_infos[arcname])
+                        stats["copied"] += 1
+                    else:
+                        zinfo = zipfile.ZipInfo.from_file(paths[arcname], arcname)
+                        zinfo.compress_type = zipfile.ZIP_DEFLATED
+                        zinfo.CRC, zinfo.file_size = hashes[arcname]["crc"], hashes[arcname]["size"]
+                        data = next(compressed)
+                        zinfo.compress_size = len(data)
+                        stats["compressed"] += 1
+                    _write_raw_member(new_zf, zinfo, data)
+            os.replace(tmp_path, archive_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    save_json(manifest_path, hashes)
+    return {**stats, "removed": len(set(old_infos) - set(files))}
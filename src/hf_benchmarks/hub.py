@@ -1,12 +1,42 @@
-from typing import Dict, List, Union
+# pandas, requests, typer and huggingface_hub take long to import, so they are only imported by the functions that use
+# them, and `import hf_benchmarks` stays fast for jobs that do not talk to the Hub
+from __future__ import annotations
 
-import pandas as pd
-import requests
-import typer
-from huggingface_hub import HfApi, list_datasets
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import requests
+    from huggingface_hub.hf_api import DatasetInfo
+
+    from .cache import ListingCache
+    from .state import SubmissionStateStore
+
+
+# The connect and read timeouts in seconds of the requests to the Hub, so that a stalled response fails instead of
+# hanging forever
+HUB_TIMEOUT = (10, 60)
 
 
 def delete_repos(repository_ids: List[str], auth_token: str, repo_type: str = "dataset") -> None:
+    import typer
+    from huggingface_hub import HfApi
+
     typer.echo(f"Found {len(repository_ids)} repos to delete")
     for repo_id in repository_ids:
         org, name = repo_id.split("/")
@@ -14,16 +44,145 @@ def delete_repos(repository_ids: List[str], auth_token: str, repo_type: str = "d
         typer.echo(f"Deleted repo: {repo_id}")
 
 
+def _to_utc(timestamp: Union[str, pd.Timestamp]) -> pd.Timestamp:
+    """Parses a timestamp, treating naive timestamps as UTC."""
+    import pandas as pd
+
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def is_time_between_batch(
+    begin_time: Union[str, pd.Timestamp], end_time: Union[str, pd.Timestamp], check_times: Sequence
+) -> np.ndarray:
+    """Checks which timestamps fall within a time window, in a single vectorised pass.
+
+    The window is parsed once and all timestamps are converted to a single UTC `datetime64` array. Naive timestamps
+    are treated as UTC and missing timestamps never fall within the window.
+
+    Args:
+        begin_time: The start of the window.
+        end_time: The end of the window. If it is before `begin_time`, the window is assumed to cross midnight.
+        check_times: The timestamps to check, e.g. the `lastModified` field of repositories.
+
+    Returns:
+        A boolean mask with the same length as `check_times`.
+    """
+    import pandas as pd
+
+    begin_time = _to_utc(begin_time).to_datetime64()
+    end_time = _to_utc(end_time).to_datetime64()
+    check_times = pd.to_datetime(pd.Index(check_times, dtype=object), utc=True).tz_localize(None).values
+    if begin_time < end_time:
+        return (check_times >= begin_time) & (check_times <= end_time)
+    else:  # crosses midnight
+        return (check_times >= begin_time) | (check_times <= end_time)
+
+
 def is_time_between(begin_time: str, end_time: str, check_time: str = None) -> bool:
     # Adapted from: https://stackoverflow.com/questions/10048249/how-do-i-determine-if-current-time-is-within-a-specified-range-using-pythons-da
+    import pandas as pd
+
     # If check time is not given, default to current UTC time
-    begin_time = pd.to_datetime(begin_time).tz_localize("UTC")
-    end_time = pd.to_datetime(end_time).tz_localize("UTC")
-    check_time = pd.to_datetime(check_time) or pd.Timestamp.now()
-    if begin_time < end_time:
-        return check_time >= begin_time and check_time <= end_time
-    else:  # crosses midnight
-        return check_time >= begin_time or check_time <= end_time
+    check_time = check_time or pd.Timestamp.now(tz="UTC")
+    return bool(is_time_between_batch(begin_time, end_time, [check_time])[0])
+
+
+def _iter_dataset_pages(filter: str, use_auth_token: Union[bool, str, None] = None) -> Iterator[List[Dict]]:
+    """Lazily pages through the Hub's `/api/datasets` listing, yielding the raw metadata of one page at a time."""
+    import requests
+    from huggingface_hub import constants
+    from huggingface_hub.utils import build_hf_headers
+
+    headers = build_hf_headers(use_auth_token=use_auth_token)
+    url: Optional[str] = f"{constants.ENDPOINT}/api/datasets"
+    params: Optional[Dict] = {"filter": filter, "full": True}
+    while url is not None:
+        response = requests.get(url, params=params, headers=headers, timeout=HUB_TIMEOUT)
+        response.raise_for_status()
+        yield response.json()
+        # The Hub returns the cursor to the next page in the `Link` header
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def _iter_benchmark_listing(
+    benchmark: str, use_auth_token: Union[bool, str, None] = None, listing_cache: ListingCache = None
+) -> Iterator[List[Dict]]:
+    """Yields the pages of the Hub listing for a benchmark, serving it from `listing_cache` when possible."""
+    filter = f"benchmark:{benchmark}"
+    if listing_cache is not None:
+        cached = listing_cache.get(filter, use_auth_token)
+        if cached is not None:
+            yield cached
+            return
+    listing: List[Dict] = []
+    for page in _iter_dataset_pages(filter=filter, use_auth_token=use_auth_token):
+        if listing_cache is not None:
+            listing.extend(page)
+        yield page
+    # Only complete listings are cached
+    if listing_cache is not None:
+        listing_cache.set(filter, use_auth_token, listing)
+
+
+REPO_TYPES = ("prediction", "model", "evaluation")
+
+
+def _is_benchmark_repo(card_data: Optional[Dict], benchmark: str) -> bool:
+    # Filter submission templates which have the submission_name="none" default value
+    card_data = card_data or {}
+    return card_data.get("benchmark") == benchmark and card_data.get("submission_name") != "none"
+
+
+def _iter_listed_repos(
+    benchmark: str,
+    use_auth_token: Union[bool, str, None] = None,
+    start_date: Union[str, pd.Timestamp] = None,
+    end_date: Union[str, pd.Timestamp] = None,
+    listing_cache: ListingCache = None,
+) -> Iterator[DatasetInfo]:
+    """Yields the repositories of a benchmark that fall within the submission window, whatever their type."""
+    from huggingface_hub.hf_api import DatasetInfo
+
+    for page in _iter_benchmark_listing(benchmark, use_auth_token=use_auth_token, listing_cache=listing_cache):
+        repos = [DatasetInfo(**data) for data in page]
+        # Filter for repos that fall within submission window
+        if start_date and end_date:
+            in_window = is_time_between_batch(start_date, end_date, [repo.lastModified for repo in repos])
+            repos = list(itertools.compress(repos, in_window))
+        for repo in repos:
+            if _is_benchmark_repo(repo.cardData, benchmark):
+                yield repo
+
+
+def iter_benchmark_repos(
+    benchmark: str,
+    use_auth_token: Union[bool, str, None] = None,
+    repo_type: str = "prediction",
+    start_date: Union[str, pd.Timestamp] = None,
+    end_date: Union[str, pd.Timestamp] = None,
+    only_new: bool = False,
+    state_store: SubmissionStateStore = None,
+    listing_cache: ListingCache = None,
+) -> Iterator[DatasetInfo]:
+    """Lazily yields the metadata of benchmark submission and evaluation repositories.
+
+    The Hub listing is paged through as the generator is consumed, so the first repositories are available before
+    the listing has finished. Arguments are the same as for `get_benchmark_repos`.
+    """
+    if only_new and state_store is None:
+        from .state import SubmissionStateStore
+
+        state_store = SubmissionStateStore()
+    for submission in _iter_listed_repos(benchmark, use_auth_token, start_date, end_date, listing_cache):
+        if submission.cardData.get("type") != repo_type:
+            continue
+        if only_new and state_store.is_dispatched(submission.id, submission.sha):
+            continue
+        yield submission
 
 
 def get_benchmark_repos(
@@ -32,7 +191,10 @@ def get_benchmark_repos(
     repo_type: str = "prediction",
     start_date: Union[str, pd.Timestamp] = None,
     end_date: Union[str, pd.Timestamp] = None,
-) -> List[Dict]:
+    only_new: bool = False,
+    state_store: SubmissionStateStore = None,
+    listing_cache: ListingCache = None,
+) -> List[DatasetInfo]:
     """Gets the metadata associated with benchmark submission and evaluation repositories.
 
     Args:
@@ -41,30 +203,53 @@ def get_benchmark_repos(
         repo_type: The type of benchmark repository. Can be `prediction`, `model` or `evaluation`.
         start_date: The timestamp for the start of the submission window.
         end_date: The timestamp for the end of the submission window.
+        only_new: If True, only return the repositories whose current commit has not been dispatched for evaluation.
+        state_store: The store of dispatched submissions used when `only_new=True`. Defaults to the one in the
+            `HF_BENCHMARKS_CACHE` directory.
+        listing_cache: An optional on-disk cache for the Hub listing, so that repeated calls within its TTL do not
+            list the benchmark again.
 
     Returns:
         The benchmark repositories' metadata of a given `repo_type`.
     """
-    submissions_to_evaluate = []
-    submissions = list_datasets(filter=f"benchmark:{benchmark}", full=True, use_auth_token=use_auth_token)
+    return list(
+        iter_benchmark_repos(
+            benchmark,
+            use_auth_token=use_auth_token,
+            repo_type=repo_type,
+            start_date=start_date,
+            end_date=end_date,
+            only_new=only_new,
+            state_store=state_store,
+            listing_cache=listing_cache,
+        )
+    )
 
-    # Filter for repos that fall within submission window
-    if start_date and end_date:
-        submissions = [
-            submission for submission in submissions if is_time_between(start_date, end_date, submission.lastModified)
-        ]
 
-    for submission in submissions:
-        # Filter submission templates which have the submission_name="none" default value
-        card_data = submission.cardData
-        if (
-            card_data.get("benchmark") == benchmark
-            and card_data.get("submission_name") != "none"
-            and card_data.get("type") == repo_type
-        ):
-            submissions_to_evaluate.append(submission)
+def get_benchmark_repos_by_type(
+    benchmark: str,
+    use_auth_token: Union[bool, str, None] = None,
+    start_date: Union[str, pd.Timestamp] = None,
+    end_date: Union[str, pd.Timestamp] = None,
+    listing_cache: ListingCache = None,
+) -> Dict[str, List[DatasetInfo]]:
+    """Gets the metadata of all benchmark repositories from a single Hub listing, grouped by repository type.
 
-    return submissions_to_evaluate
+    Args:
+        benchmark: The benchmark name.
+        use_auth_token: The authentication token for the Hugging Face Hub
+        start_date: The timestamp for the start of the submission window.
+        end_date: The timestamp for the end of the submission window.
+        listing_cache: An optional on-disk cache for the Hub listing.
+
+    Returns:
+        A mapping from repository type (`prediction`, `model`, `evaluation` and any other type found in the
+        listing) to the benchmark repositories' metadata of that type.
+    """
+    repos_by_type: Dict[str, List[DatasetInfo]] = {repo_type: [] for repo_type in REPO_TYPES}
+    for repo in _iter_listed_repos(benchmark, use_auth_token, start_date, end_date, listing_cache):
+        repos_by_type.setdefault(repo.cardData.get("type"), []).append(repo)
+    return repos_by_type
 
 
 def get_model_index(submissions):
@@ -76,20 +261,361 @@ def get_model_index(submissions):
     return all_scores
 
 
+def _download_file(session: requests.Session, url: str, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with session.get(url, stream=True, timeout=HUB_TIMEOUT) as response:
+        response.raise_for_status()
+        # Write to a temporary file first, so that an interrupted download is never mistaken for a cached one
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            try:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+            except BaseException:
+                os.unlink(f.name)
+                raise
+    os.replace(f.name, path)
+
+
+def download_repo_files(
+    repos: Sequence[DatasetInfo],
+    filename: str,
+    cache_dir: Union[str, Path],
+    use_auth_token: Union[bool, str, None] = None,
+    max_workers: int = 8,
+    repo_type: str = "dataset",
+) -> Dict[str, Path]:
+    """Downloads the same file from many repositories in parallel, caching each copy by the repository's commit SHA.
+
+    A repository whose SHA has not changed since a previous download is not fetched again. Repositories without a
+    SHA in their metadata are always downloaded.
+
+    Args:
+        repos: The metadata of the repositories, e.g. as returned by `get_benchmark_repos`.
+        filename: The path of the file in each repository.
+        cache_dir: The directory of the downloaded files, stored as `{cache_dir}/{namespace}--{name}/{sha}/{filename}`.
+        use_auth_token: The authentication token for the Hugging Face Hub
+        max_workers: The maximum number of concurrent downloads.
+        repo_type: The type of the repositories.
+
+    Returns:
+        A mapping from repository ID to the local path of its file, in the order of `repos`.
+    """
+    import requests
+    from huggingface_hub import constants
+    from huggingface_hub.utils import build_hf_headers
+    from requests.adapters import HTTPAdapter
+
+    paths = {}
+    to_download = []
+    for repo in repos:
+        path = Path(cache_dir) / repo.id.replace("/", "--") / (repo.sha or "latest") / filename
+        paths[repo.id] = path
+        if repo.sha is None or not path.exists():
+            revision = quote(repo.sha or "main", safe="")
+            prefix = constants.REPO_TYPES_URL_PREFIXES.get(repo_type, "")
+            url = f"{constants.ENDPOINT}/{prefix}{repo.id}/resolve/{revision}/{quote(filename)}"
+            to_download.append((url, path))
+
+    if len(to_download) > 0:
+        with requests.Session() as session:
+            session.headers.update(build_hf_headers(use_auth_token=use_auth_token))
+            session.mount("http://", HTTPAdapter(pool_maxsize=max_workers))
+            session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_download_file, session, url, path) for url, path in to_download]
+                for future in futures:
+                    future.result()
+    return paths
+
+
+def _file_hashes(path: Path) -> Tuple[str, str]:
+    """Returns the SHA-256 of a file, as used by LFS, and its git blob SHA-1, in a single read."""
+    sha256 = hashlib.sha256()
+    sha1 = hashlib.sha1(f"blob {path.stat().st_size}\0".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+            sha1.update(chunk)
+    return sha256.hexdigest(), sha1.hexdigest()
+
+
+def _repo_file_hashes(
+    repo_id: str, repo_type: str, revision: Optional[str], use_auth_token: Union[bool, str, None]
+) -> Tuple[Optional[str], Dict[str, str]]:
+    from huggingface_hub import HfApi, constants
+
+    info = HfApi(endpoint=constants.ENDPOINT).repo_info(
+        repo_id, revision=revision, repo_type=repo_type, files_metadata=True, use_auth_token=use_auth_token
+    )
+    hashes = {}
+    for sibling in info.siblings or []:
+        lfs = getattr(sibling, "lfs", None)
+        hashes[sibling.rfilename] = lfs["sha256"] if lfs else sibling.blob_id
+    return info.sha, hashes
+
+
+def get_repo_file_hashes(
+    repo_id: str,
+    repo_type: str = "dataset",
+    revision: Optional[str] = None,
+    use_auth_token: Union[bool, str, None] = None,
+) -> Dict[str, str]:
+    """Lists the files of a repository with the hash of their content, without downloading them.
+
+    Args:
+        repo_id: The ID of the repository.
+        repo_type: The type of the repository.
+        revision: The revision of the repository. Defaults to the main branch.
+        use_auth_token: The authentication token for the Hugging Face Hub
+
+    Returns:
+        A mapping from the path of each file to the SHA-256 of LFS files, or the git blob SHA-1 of the others.
+    """
+    return _repo_file_hashes(repo_id, repo_type, revision, use_auth_token)[1]
+
+
+def sync_repo_file(
+    repo_id: str,
+    filename: str,
+    path: Union[str, Path],
+    repo_type: str = "dataset",
+    use_auth_token: Union[bool, str, None] = None,
+) -> bool:
+    """Downloads a file from a repository to `path`, unless the local copy already has the same content.
+
+    Args:
+        repo_id: The ID of the repository.
+        filename: The path of the file in the repository.
+        path: The local path of the file.
+        repo_type: The type of the repository.
+        use_auth_token: The authentication token for the Hugging Face Hub
+
+    Returns:
+        Whether the file was downloaded. Files missing from the repository are left as they are locally.
+    """
+    import requests
+    from huggingface_hub import constants
+    from huggingface_hub.utils import build_hf_headers
+
+    path = Path(path)
+    remote_hash = get_repo_file_hashes(repo_id, repo_type, use_auth_token=use_auth_token).get(filename)
+    if remote_hash is None or (path.exists() and remote_hash in _file_hashes(path)):
+        return False
+    prefix = constants.REPO_TYPES_URL_PREFIXES.get(repo_type, "")
+    url = f"{constants.ENDPOINT}/{prefix}{repo_id}/resolve/main/{quote(filename)}"
+    with requests.Session() as session:
+        session.headers.update(build_hf_headers(use_auth_token=use_auth_token))
+        _download_file(session, url, path)
+    return True
+
+
+def push_changed_files(
+    repo_id: str,
+    files: Mapping[str, Union[str, Path]],
+    commit_message: str,
+    repo_type: str = "dataset",
+    revision: Optional[str] = None,
+    use_auth_token: Union[bool, str, None] = None,
+) -> List[str]:
+    """Uploads the files whose content differs from the repository's, in a single commit over HTTP.
+
+    Local files are hashed and compared with the hashes listed by the Hub, so that unchanged files are neither
+    uploaded nor committed, and no clone of the repository is needed. The commit fails if the repository was
+    updated since it was listed.
+
+    Args:
+        repo_id: The ID of the repository.
+        files: Mapping from the path of each file in the repository to its local path.
+        commit_message: The message of the commit.
+        repo_type: The type of the repository.
+        revision: The branch to commit to. Defaults to the main branch.
+        use_auth_token: The authentication token for the Hugging Face Hub
+
+    Returns:
+        The paths of the files that were committed, which is empty when all the files are up to date.
+    """
+    from huggingface_hub import CommitOperationAdd, HfApi, constants
+
+    sha, remote_hashes = _repo_file_hashes(repo_id, repo_type, revision, use_auth_token)
+    changed = [
+        path_in_repo
+        for path_in_repo, path in files.items()
+        if remote_hashes.get(path_in_repo) not in _file_hashes(Path(path))
+    ]
+    if len(changed) == 0:
+        return []
+    operations = [CommitOperationAdd(path_in_repo=p, path_or_fileobj=str(files[p])) for p in changed]
+    HfApi(endpoint=constants.ENDPOINT).create_commit(
+        repo_id,
+        operations,
+        commit_message=commit_message,
+        token=use_auth_token if isinstance(use_auth_token, str) else None,
+        repo_type=repo_type,
+        revision=revision,
+        parent_commit=sha,
+    )
+    return changed
+
+
 def get_auth_headers(token: str, prefix: str = "Bearer"):
     return {"Authorization": f"{prefix} {token}"}
 
 
+class UnreachableAPIError(Exception):
+    """Raised when the AutoTrain API cannot be reached."""
+
+
+class AutoTrainClient:
+    """Client for the AutoTrain API that keeps connections alive across calls.
+
+    Requests that fail with a connection error, a timeout or a 429/5xx status code are retried with exponential
+    backoff, honouring the `Retry-After` header when the API sends one. Requests with other methods than
+    `retry_methods`, e.g. the `POST` that creates a project, may not be safe to replay, so they are only retried when
+    the API cannot have acted on them: when the connection could not be established or on a 429 status code. The
+    latency of every call is recorded per route in `stats`.
+
+    Args:
+        domain: The AutoTrain API endpoint.
+        token: The default AutoTrain API token, used when a call does not provide its own.
+        timeout: The connect and read timeouts in seconds.
+        max_retries: The maximum number of times a call is retried.
+        backoff_factor: The base delay in seconds between two retries, doubled after each attempt.
+        max_retry_after: Upper bound in seconds on the delay requested through `Retry-After`.
+        pool_maxsize: The maximum number of connections kept alive in the pool.
+        retry_methods: The HTTP methods that are safe to retry after any transient failure.
+    """
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        domain: str,
+        token: str = None,
+        timeout: Union[float, Tuple[float, float]] = (10, 60),
+        max_retries: int = 3,
+        backoff_factor: float = 1.0,
+        max_retry_after: float = 120,
+        pool_maxsize: int = 32,
+        retry_methods: Sequence[str] = ("GET", "HEAD"),
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.domain = domain
+        self.token = token
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        self.retry_methods = {method.upper() for method in retry_methods}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def get(self, path: str, token: str = None, params=None) -> requests.Response:
+        return self.request("GET", path, token=token, params=params)
+
+    def post(self, path: str, token: str = None, payload=None, params=None) -> requests.Response:
+        return self.request("POST", path, token=token, json=payload, params=params)
+
+    def request(self, method: str, path: str, token: str = None, **kwargs) -> requests.Response:
+        """Sends a request to the AutoTrain API, retrying transient failures.
+
+        Raises:
+            UnreachableAPIError: If the API cannot be reached after all retries.
+            requests.HTTPError: If the API responds with an error status code.
+        """
+        import requests
+
+        url = self.domain + path
+        headers = get_auth_headers(token=token or self.token)
+        idempotent = method.upper() in self.retry_methods
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, headers=headers, timeout=self.timeout, allow_redirects=True, **kwargs
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(method, path, time.perf_counter() - start, failed=True)
+                if attempt == self.max_retries or (not idempotent and _may_have_been_sent(e)):
+                    raise UnreachableAPIError(
+                        f"❌ Failed to reach AutoTrain API at {url}, check your internet connection"
+                    ) from e
+                delay = self._backoff(attempt)
+            else:
+                failed = response.status_code >= 400
+                self._record(method, path, time.perf_counter() - start, failed=failed)
+                retry = response.status_code == 429 or (idempotent and response.status_code in self.RETRY_STATUS_CODES)
+                if not retry or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_factor * (2**attempt) * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return None
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            # The header can also be an HTTP date
+            import pandas as pd
+
+            try:
+                delay = (parsedate_to_datetime(retry_after) - pd.Timestamp.now(tz="UTC")).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.max_retry_after)
+
+    def _record(self, method: str, path: str, seconds: float, failed: bool = False) -> None:
+        # Collapse numeric path segments like project IDs so that stats are aggregated per route
+        route = f"{method} {re.sub(r'/[0-9]+(?=/|$)', '/{id}', path)}"
+        with self._stats_lock:
+            stats = self.stats.setdefault(route, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+
+def _may_have_been_sent(error: requests.exceptions.RequestException) -> bool:
+    """Whether the request may have reached the server before `error`, i.e. whether the connection was established."""
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return not isinstance(reason, NewConnectionError)
+
+
+_autotrain_clients: Dict[str, AutoTrainClient] = {}
+_autotrain_clients_lock = threading.Lock()
+
+
+def get_autotrain_client(domain: str) -> AutoTrainClient:
+    """Returns the process-wide `AutoTrainClient` for `domain`, creating it on first use."""
+    with _autotrain_clients_lock:
+        if domain not in _autotrain_clients:
+            _autotrain_clients[domain] = AutoTrainClient(domain=domain)
+        return _autotrain_clients[domain]
+
+
 def http_post(path: str, token: str, payload=None, domain: str = None, params=None) -> requests.Response:
     """HTTP POST request to the AutoNLP API, raises UnreachableAPIError if the API cannot be reached"""
-    try:
-        response = requests.post(
-            url=domain + path, json=payload, headers=get_auth_headers(token=token), allow_redirects=True, params=params
-        )
-    except requests.exceptions.ConnectionError:
-        print("❌ Failed to reach AutoNLP API, check your internet connection")
-    response.raise_for_status()
-    return response
+    return get_autotrain_client(domain).post(path, token=token, payload=payload, params=params)
 
 
 def http_get(
@@ -97,10 +623,187 @@ def http_get(
     token: str,
     domain: str = None,
 ) -> requests.Response:
-    """HTTP POST request to the AutoNLP API, raises UnreachableAPIError if the API cannot be reached"""
-    try:
-        response = requests.get(url=domain + path, headers=get_auth_headers(token=token), allow_redirects=True)
-    except requests.exceptions.ConnectionError:
-        print("❌ Failed to reach AutoNLP API, check your internet connection")
-    response.raise_for_status()
-    return response
+    """HTTP GET request to the AutoNLP API, raises UnreachableAPIError if the API cannot be reached"""
+    return get_autotrain_client(domain).get(path, token=token)
+
+
+class ProjectStatusPoller:
+    """Waits on the status of many AutoTrain projects from a single background thread.
+
+    Each watched project is polled with exponential backoff and jitter, while a global request budget caps the
+    rate of calls to the AutoTrain API regardless of how many projects are outstanding. The AutoTrain API has no
+    endpoint to fetch the status of several projects at once, so every poll is still one request per project: with
+    many projects in flight, each one is polled less often than its interval, but the request rate stays bounded.
+
+    Args:
+        token: The AutoTrain API token.
+        domain: The AutoTrain API endpoint.
+        target_status: The project status to wait for. See `database.database.enums.ProjectStatus` in AutoTrain.
+        initial_interval: The delay in seconds before a project is polled for the first time.
+        max_interval: The maximum delay in seconds between two polls of the same project.
+        backoff_factor: The factor by which the delay between two polls of the same project grows.
+        jitter: The relative amount of random jitter applied to each delay.
+        max_requests_per_second: The global request budget shared by all watched projects.
+        max_errors: The number of consecutive failed requests after which a project is given up on.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        domain: str = None,
+        target_status: int = 3,
+        initial_interval: float = 5.0,
+        max_interval: float = 60.0,
+        backoff_factor: float = 1.5,
+        jitter: float = 0.1,
+        max_requests_per_second: float = 1.0,
+        max_errors: int = 5,
+    ):
+        self.token = token
+        self.domain = domain
+        self.target_status = target_status
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.max_requests_per_second = max_requests_per_second
+        self.max_errors = max_errors
+        self.num_requests = 0
+        # Min-heap of (next poll time, tie-breaker, project id)
+        self._schedule: List = []
+        self._counter = itertools.count()
+        self._watches: Dict[int, Dict] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._next_request_at = 0.0
+
+    def watch(self, project_id: int, callback: Callable[[int, Dict], None] = None) -> Future:
+        """Starts tracking a project.
+
+        Args:
+            project_id: The AutoTrain project ID.
+            callback: Called with the project ID and status payload once the project reaches `target_status`.
+                It runs on the poller thread, so it should return quickly.
+
+        Returns:
+            A future that resolves to the project status payload once the project reaches `target_status`.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot watch a project on a closed poller")
+            if project_id in self._watches:
+                watch = self._watches[project_id]
+            else:
+                watch = {"future": Future(), "callbacks": [], "interval": self.initial_interval, "errors": 0}
+                self._watches[project_id] = watch
+                self._reschedule(project_id, watch, watch["interval"])
+            if callback is not None:
+                watch["callbacks"].append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="autotrain-poller", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return watch["future"]
+
+    def close(self) -> None:
+        """Stops the poller thread. Projects still being watched have their futures cancelled."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        for watch in self._watches.values():
+            watch["future"].cancel()
+        self._watches.clear()
+
+    def unwatch(self, project_id: int) -> None:
+        """Stops tracking a project, e.g. after giving up on waiting for it, and cancels its future.
+
+        The project is not polled anymore, so it does not use up the request budget of the other projects.
+        """
+        with self._condition:
+            watch = self._watches.pop(project_id, None)
+        if watch is not None:
+            watch["future"].cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reschedule(self, project_id: int, watch: Dict, delay: float) -> None:
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        # Entries of projects that were unwatched, or watched again since, are skipped by `_next_due`
+        watch["entry"] = next(self._counter)
+        heapq.heappush(self._schedule, (time.monotonic() + delay, watch["entry"], project_id))
+
+    def _next_due(self) -> Optional[int]:
+        """Blocks until a project is due for polling and the request budget allows it. Returns None on close."""
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                if self._schedule:
+                    next_poll = max(self._schedule[0][0], self._next_request_at)
+                    if next_poll <= now:
+                        _, entry, project_id = heapq.heappop(self._schedule)
+                        watch = self._watches.get(project_id)
+                        if watch is None or watch["entry"] != entry:
+                            continue
+                        self._next_request_at = now + 1 / self.max_requests_per_second
+                        return project_id
+                    self._condition.wait(timeout=next_poll - now)
+                else:
+                    self._condition.wait()
+        return None
+
+    def _run(self) -> None:
+        while True:
+            project_id = self._next_due()
+            if project_id is None:
+                return
+            try:
+                self._poll(project_id)
+            except Exception as e:
+                # An unexpected error, e.g. a malformed status payload, only fails the project being polled, so
+                # that the thread keeps serving the other futures
+                self._finish(project_id, exception=e)
+
+    def _poll(self, project_id: int) -> None:
+        watch = self._watches[project_id]
+        try:
+            self.num_requests += 1
+            project_status = http_get(path=f"/projects/{project_id}", token=self.token, domain=self.domain).json()
+        except Exception as e:
+            watch["errors"] += 1
+            if watch["errors"] >= self.max_errors:
+                self._finish(project_id, exception=e)
+                return
+            project_status = None
+        else:
+            watch["errors"] = 0
+
+        if project_status is not None and project_status["status"] == self.target_status:
+            self._finish(project_id, result=project_status)
+        else:
+            with self._condition:
+                watch["interval"] = min(self.max_interval, watch["interval"] * self.backoff_factor)
+                self._reschedule(project_id, watch, watch["interval"])
+
+    def _finish(self, project_id: int, result: Dict = None, exception: Exception = None) -> None:
+        with self._condition:
+            watch = self._watches.pop(project_id, None)
+        if watch is None:
+            # The project was already finished before the error
+            return
+        if exception is not None:
+            watch["future"].set_exception(exception)
+            return
+        try:
+            for callback in watch["callbacks"]:
+                callback(project_id, result)
+        except Exception as e:
+            watch["future"].set_exception(e)
+        else:
+            watch["future"].set_result(result)
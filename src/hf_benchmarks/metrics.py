@@ -0,0 +1,200 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .file_utils import HF_BENCHMARKS_CACHE
+
+
+AVERAGES = ("binary", "micro", "macro", "weighted")
+
+# Metrics computed by the kernels below, without loading a metric script
+BUILTIN_METRICS = ("accuracy", "precision", "recall", "f1")
+
+# Pinned metric scripts, stored as `<name>/<name>.py`, are loaded from here instead of the Hub to work offline
+METRICS_CACHE = Path(os.getenv("HF_BENCHMARKS_METRICS_CACHE", HF_BENCHMARKS_CACHE / "metrics"))
+
+_metrics: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Any] = {}
+_metrics_lock = threading.Lock()
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # Like scikit-learn with `zero_division=0`, ill-defined scores are set to zero
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator == 0, 0.0, numerator / np.where(denominator == 0, 1, denominator))
+
+
+def confusion_matrix(
+    references: np.ndarray, predictions: np.ndarray, labels: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts every (reference, prediction) pair in a single `np.bincount`.
+
+    Args:
+        references: The ground truth labels.
+        predictions: The predicted labels, in the same order as `references`.
+        labels: The sorted labels that index the matrix. Defaults to the labels that appear in `references` or
+            `predictions`.
+
+    Raises:
+        ValueError: If `references` or `predictions` contain a label that is not in `labels`.
+
+    Returns:
+        A tuple `(matrix, labels)` where `matrix[i, j]` is the number of examples with reference `labels[i]` and
+        prediction `labels[j]`.
+    """
+    references, predictions = np.asarray(references), np.asarray(predictions)
+    if len(references) != len(predictions):
+        raise ValueError(f"Got {len(predictions)} predictions for {len(references)} references")
+    if labels is None:
+        labels = np.union1d(references, predictions)
+    else:
+        labels = np.asarray(labels)
+        # `np.searchsorted` maps unknown labels to the index of a neighbouring label, so they are rejected up front
+        unknown = np.setdiff1d(np.union1d(references, predictions), labels)
+        if len(unknown) > 0:
+            raise ValueError(f"Labels {unknown.tolist()} are not in labels={labels.tolist()}")
+    num_labels = len(labels)
+    reference_codes = np.searchsorted(labels, references)
+    prediction_codes = np.searchsorted(labels, predictions)
+    matrix = np.bincount(reference_codes * num_labels + prediction_codes, minlength=num_labels * num_labels)
+    return matrix.reshape(num_labels, num_labels), labels
+
+
+def precision_recall_f1(
+    matrix: np.ndarray, labels: np.ndarray, average: str = "macro", pos_label=1
+) -> Dict[str, float]:
+    """Computes the precision, recall and F1 score from a confusion matrix.
+
+    Args:
+        matrix: The confusion matrix, as returned by `confusion_matrix`.
+        labels: The labels that index the matrix.
+        average: How to average the per-label scores, one of `binary`, `micro`, `macro` or `weighted`, with the same
+            meaning as in scikit-learn.
+        pos_label: The label to score when `average="binary"`.
+
+    Returns:
+        A dictionary with the `precision`, `recall` and `f1` scores.
+    """
+    if average not in AVERAGES:
+        raise ValueError(f"Unknown average {average!r}, expected one of {AVERAGES}")
+    true_positives = np.diag(matrix).astype(np.float64)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+
+    if average == "binary":
+        if len(labels) > 2:
+            raise ValueError(f"average='binary' requires at most 2 labels, got {len(labels)}")
+        # A positive label that never occurs has no true positives, predictions or support
+        mask = labels == pos_label
+        true_positives, predicted, support = true_positives[mask], predicted[mask], support[mask]
+    elif average == "micro":
+        true_positives, predicted, support = true_positives.sum(keepdims=True), predicted.sum(), support.sum()
+
+    precision = _divide(true_positives, predicted)
+    recall = _divide(true_positives, support)
+    f1 = _divide(2 * true_positives, predicted + support)
+    if average == "weighted":
+        weights = support
+    else:
+        weights = np.ones_like(true_positives)
+    if weights.sum() == 0:
+        return {"precision": 0.0, "recall": 0.0, "f1": 0.0}
+    return {
+        "precision": float(np.average(precision, weights=weights)),
+        "recall": float(np.average(recall, weights=weights)),
+        "f1": float(np.average(f1, weights=weights)),
+    }
+
+
+def classification_metrics(
+    references: np.ndarray, predictions: np.ndarray, average: str = "macro", pos_label=1
+) -> Dict[str, float]:
+    """Computes the accuracy, precision, recall and F1 score of some predictions from one confusion matrix.
+
+    Args:
+        references: The ground truth labels.
+        predictions: The predicted labels, in the same order as `references`.
+        average: How to average the per-label precision, recall and F1 score, one of `binary`, `micro`, `macro` or
+            `weighted`, with the same meaning as in scikit-learn.
+        pos_label: The label to score when `average="binary"`.
+
+    Returns:
+        A dictionary with the `accuracy`, `precision`, `recall` and `f1` scores.
+    """
+    matrix, labels = confusion_matrix(references, predictions)
+    total = matrix.sum()
+    accuracy = float(np.trace(matrix) / total) if total > 0 else 0.0
+    return {"accuracy": accuracy, **precision_recall_f1(matrix, labels, average=average, pos_label=pos_label)}
+
+
+def f1_score(references: np.ndarray, predictions: np.ndarray, average: str = "macro", pos_label=1) -> float:
+    """Computes the F1 score of some predictions, see `classification_metrics`."""
+    return classification_metrics(references, predictions, average=average, pos_label=pos_label)["f1"]
+
+
+class ClassificationMetric:
+    """A built-in metric with the same `compute` interface as the `evaluate` metric of the same name.
+
+    Args:
+        name: One of `BUILTIN_METRICS`.
+    """
+
+    def __init__(self, name: str):
+        if name not in BUILTIN_METRICS:
+            raise ValueError(f"Unknown built-in metric {name!r}, expected one of {BUILTIN_METRICS}")
+        self.name = name
+
+    def compute(self, predictions, references, average: str = "binary", pos_label=1) -> Dict[str, float]:
+        if self.name == "accuracy":
+            # Accuracy does not depend on the averaging of the per-label scores
+            average = "micro"
+        scores = classification_metrics(references, predictions, average=average, pos_label=pos_label)
+        return {self.name: scores[self.name]}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+
+def _load_metric(name: str, **config):
+    if name in BUILTIN_METRICS and not config:
+        return ClassificationMetric(name)
+    # Imported on first use since most benchmarks only need the built-in metrics
+    import evaluate  # type: ignore
+
+    local_path = METRICS_CACHE / name
+    if (local_path / f"{name}.py").exists():
+        return evaluate.load(str(local_path), **config)
+    return evaluate.load(name, **config)
+
+
+def get_metric(name: str, **config):
+    """Loads a metric once per process and returns the same object on every later call.
+
+    The `accuracy`, `precision`, `recall` and `f1` metrics are computed by the built-in kernels. Other metrics, or
+    built-in ones with a configuration, are loaded with `evaluate.load`, from `METRICS_CACHE` when a pinned copy of
+    the metric script is stored there. Unlike the built-in metrics, `evaluate` metrics are not thread-safe and
+    should not be shared between threads.
+
+    Args:
+        name: The name of the metric, e.g. `f1`.
+        **config: Keyword arguments passed to `evaluate.load`, e.g. `config_name`.
+
+    Returns:
+        An object whose `compute(predictions=..., references=..., **kwargs)` method returns a dictionary of scores.
+    """
+    key = (name, tuple(sorted(config.items())))
+    metric = _metrics.get(key)
+    if metric is None:
+        with _metrics_lock:
+            metric = _metrics.get(key)
+            if metric is None:
+                metric = _metrics[key] = _load_metric(name, **config)
+    return metric
+
+
+def warm_metrics(names: Iterable[str]) -> None:
+    """Loads some metrics ahead of time, e.g. when a worker process starts, so that scoring does not wait for them."""
+    for name in names:
+        get_metric(name)
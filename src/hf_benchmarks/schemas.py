@@ -1,4 +1,4 @@
-from typing import List, Optional, TypedDict, Union
+from typing import Any, Dict, List, Optional, TypedDict, Union
 
 
 class Metric(TypedDict):
@@ -19,3 +19,9 @@ class Result(TypedDict):
 
 class Evaluation(TypedDict):
     results: List[Result]
+
+
+class SubmissionResult(TypedDict):
+    submission: Union[str, Dict[str, str]]
+    evaluation: Optional[Any]
+    error: Optional[str]
@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+
+SCORE_COLUMNS = ["submission", "submission_name", "dataset", "metric", "key", "score", "value", "is_score"]
+
+
+def scores_to_table(submissions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Normalises the nested scores of many submissions into one long table, in a single pass.
+
+    Each submission is a mapping from dataset name to the scores of its metrics, where a score is a number, a
+    string or a mapping of sub-scores (e.g. the precision, recall and F1 of a ROUGE score). Top-level fields that are
+    not datasets, like `submission_name` or `param_count`, are kept as rows without a metric.
+
+    Args:
+        submissions: The scores of each submission.
+
+    Returns:
+        A table with one row per (submission, dataset, metric, key) and the columns:
+            - `submission`: the position of the submission in `submissions`.
+            - `submission_name`: the name of the submission.
+            - `dataset`: the dataset, or the name of a top-level field.
+            - `metric`: the metric, or `None` for top-level fields and for the row that marks each dataset.
+            - `key`: the key of a sub-score, or `None`.
+            - `score`: the value of floating point scores, which can be filtered and rounded as a column.
+            - `value`: the value of any other score or field.
+            - `is_score`: whether the value is in the `score` column.
+    """
+    rows = []
+
+    def add_row(submission, submission_name, dataset, metric, key, value):
+        if isinstance(value, float):
+            rows.append((submission, submission_name, dataset, metric, key, value, None, True))
+        else:
+            rows.append((submission, submission_name, dataset, metric, key, np.nan, value, False))
+
+    for submission, scores in enumerate(submissions):
+        submission_name = scores.get("submission_name")
+        for dataset, data in scores.items():
+            if not isinstance(data, dict):
+                add_row(submission, submission_name, dataset, None, None, data)
+                continue
+            # Marks the dataset, so that it is kept even when none of its metrics are
+            add_row(submission, submission_name, dataset, None, None, {})
+            for metric, value in data.items():
+                if isinstance(value, dict) and len(value) > 0:
+                    for key, sub_value in value.items():
+                        add_row(submission, submission_name, dataset, metric, key, sub_value)
+                else:
+                    add_row(submission, submission_name, dataset, metric, None, value)
+
+    table = pd.DataFrame.from_records(rows, columns=SCORE_COLUMNS)
+    return table.astype({"score": np.float64, "is_score": bool})
+
+
+def table_to_scores(table: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rebuilds the nested scores of each submission from a table built by `scores_to_table`.
+
+    Args:
+        table: The table of scores.
+
+    Returns:
+        The scores of each submission, in the order of the submissions and with the keys in the order of the rows.
+    """
+    submissions: Dict[int, Dict[str, Any]] = {}
+    for row in table.itertuples(index=False):
+        scores = submissions.setdefault(row.submission, {})
+        value = row.score if row.is_score else row.value
+        if isinstance(value, dict):
+            # Copied since the dataset dictionaries are filled below, and the table may be converted again
+            value = dict(value)
+        if pd.isna(row.metric):
+            scores[row.dataset] = value
+        elif pd.isna(row.key):
+            scores[row.dataset][row.metric] = value
+        else:
+            scores[row.dataset].setdefault(row.metric, {})[row.key] = value
+    return list(submissions.values())
+
+
+def round_scores(table: pd.DataFrame, decimals: int = 3) -> pd.DataFrame:
+    """Rounds the floating point scores of every metric, leaving the top-level fields unchanged."""
+    table = table.copy()
+    is_metric = table["metric"].notna()
+    table.loc[is_metric, "score"] = table.loc[is_metric, "score"].round(decimals)
+    return table
+
+
+def save_scores_table(table: pd.DataFrame, path: Union[str, Path]) -> None:
+    """Saves the metric rows of a table of scores as Parquet, with the other values encoded as JSON strings."""
+    table = table[table["metric"].notna()].reset_index(drop=True)
+    table = table.assign(value=[None if v is None else json.dumps(v) for v in table["value"]])
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    table.to_parquet(path, index=False)
@@ -0,0 +1,71 @@
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterable, List, Union
+
+import pandas as pd
+
+from .file_utils import HF_BENCHMARKS_CACHE
+
+
+class SubmissionStateStore:
+    """Persistent record of the submissions that have already been dispatched for evaluation.
+
+    Submissions are identified by their repository ID and Git commit SHA, so pushing a new commit to a submission
+    repository makes it eligible for evaluation again. The state is kept in a SQLite database, which makes it safe
+    to share between threads and processes.
+
+    Args:
+        path: The path to the SQLite database. Defaults to `submissions.db` in the `HF_BENCHMARKS_CACHE` directory.
+    """
+
+    def __init__(self, path: Union[str, Path] = None):
+        self.path = Path(path) if path is not None else HF_BENCHMARKS_CACHE / "submissions.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dispatched (
+                    repo_id TEXT NOT NULL,
+                    sha TEXT NOT NULL,
+                    last_modified TEXT,
+                    dispatched_at TEXT NOT NULL,
+                    PRIMARY KEY (repo_id, sha)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        # The connection's own context manager only commits the transaction, so we close it explicitly
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def is_dispatched(self, repo_id: str, sha: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM dispatched WHERE repo_id = ? AND sha = ?", (repo_id, sha)).fetchone()
+        return row is not None
+
+    def filter_new(self, submissions: Iterable) -> List:
+        """Returns the submissions whose (repo ID, SHA) pair has not been dispatched yet."""
+        submissions = list(submissions)
+        with self._connect() as conn:
+            seen = set(conn.execute("SELECT repo_id, sha FROM dispatched").fetchall())
+        return [submission for submission in submissions if (submission.id, submission.sha) not in seen]
+
+    def mark_dispatched(self, submission) -> None:
+        """Records that a submission has been dispatched for evaluation."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO dispatched (repo_id, sha, last_modified, dispatched_at) VALUES (?, ?, ?, ?)",
+                (submission.id, submission.sha, submission.lastModified, pd.Timestamp.now(tz="UTC").isoformat()),
+            )
+
+    def forget(self, repo_id: str = None) -> None:
+        """Removes the records of a repository, or of every repository if `repo_id` is not given."""
+        with self._connect() as conn:
+            if repo_id is None:
+                conn.execute("DELETE FROM dispatched")
+            else:
+                conn.execute("DELETE FROM dispatched WHERE repo_id = ?", (repo_id,))
@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+import numpy as np
+from datasets import Dataset
+
+from hf_benchmarks import AlignmentError, align_by_id, align_predictions, read_columns
+
+
+class AlignByIdTest(TestCase):
+    def test_aligns_shuffled_submission(self):
+        rng = np.random.default_rng(0)
+        reference_ids = rng.permutation(1000)
+        submission_ids = rng.permutation(1000)
+        positions = align_by_id(reference_ids, submission_ids)
+        np.testing.assert_array_equal(submission_ids[positions], reference_ids)
+
+    def test_aligns_string_ids(self):
+        positions = align_by_id(np.array(["b", "a", "c"]), np.array(["c", "b", "a"]))
+        np.testing.assert_array_equal(positions, [1, 2, 0])
+
+    def test_raises_on_duplicate_ids(self):
+        with self.assertRaises(AlignmentError) as context:
+            align_by_id(np.arange(4), np.array([0, 1, 1, 2, 3, 3]))
+        self.assertEqual(context.exception.duplicate_ids, [1, 3])
+
+    def test_raises_on_missing_ids(self):
+        # IDs before, between and after the submission IDs
+        with self.assertRaises(AlignmentError) as context:
+            align_by_id(np.array([0, 2, 5, 9]), np.array([2, 5]))
+        self.assertEqual(context.exception.missing_ids, [0, 9])
+        with self.assertRaises(AlignmentError) as context:
+            align_by_id(np.arange(3), np.array([], dtype=int))
+        self.assertEqual(context.exception.missing_ids, [0, 1, 2])
+
+    def test_warns_on_extra_ids(self):
+        with self.assertWarns(UserWarning):
+            positions = align_by_id(np.array([3, 1]), np.array([1, 2, 3]))
+        np.testing.assert_array_equal(positions, [2, 0])
+
+
+class AlignPredictionsTest(TestCase):
+    def setUp(self):
+        self.references = read_columns(
+            Dataset.from_dict({"id": [3, 1, 2], "text": ["c", "a", "b"], "label": [1, 0, 1]}), ["id", "label"]
+        )
+
+    def test_read_columns(self):
+        self.assertEqual(set(self.references), {"id", "label"})
+        np.testing.assert_array_equal(self.references["id"], [3, 1, 2])
+        np.testing.assert_array_equal(self.references["label"], [1, 0, 1])
+
+    def test_aligns_by_id(self):
+        submission = Dataset.from_dict({"id": [1, 2, 3], "label": [10, 20, 30]})
+        predictions = align_predictions(self.references, submission, label_column="label", id_column="id")
+        np.testing.assert_array_equal(predictions, [30, 10, 20])
+
+    def test_aligns_by_position_without_ids(self):
+        submission = Dataset.from_dict({"label": [10, 20, 30]})
+        predictions = align_predictions(self.references, submission, label_column="label", id_column="id")
+        np.testing.assert_array_equal(predictions, [10, 20, 30])
+        with self.assertRaises(AlignmentError):
+            align_predictions(self.references, submission.select([0, 1]), label_column="label")
@@ -0,0 +1,41 @@
+import os
+from unittest import TestCase
+
+from hf_benchmarks import metrics, run_batch
+
+
+def scale(references, submission):
+    if submission < 0:
+        raise ValueError(f"Invalid submission {submission}")
+    return {"score": references["factor"] * submission, "pid": os.getpid()}
+
+
+def loaded_metrics(references, submission):
+    return list(metrics._metrics)
+
+
+class RunBatchTest(TestCase):
+    def test_results_are_in_input_order(self):
+        submissions = list(range(20))
+        for workers in [1, 4]:
+            results = run_batch(scale, {"factor": 2}, submissions, workers=workers)
+            self.assertEqual([r["submission"] for r in results], submissions)
+            self.assertEqual([r["evaluation"]["score"] for r in results], [2 * s for s in submissions])
+            self.assertTrue(all(r["error"] is None for r in results))
+
+    def test_scores_in_worker_processes(self):
+        results = run_batch(scale, {"factor": 2}, list(range(8)), workers=2)
+        self.assertNotIn(os.getpid(), {r["evaluation"]["pid"] for r in results})
+        results = run_batch(scale, {"factor": 2}, list(range(8)), workers=1)
+        self.assertEqual({r["evaluation"]["pid"] for r in results}, {os.getpid()})
+
+    def test_errors_are_reported_per_submission(self):
+        for workers in [1, 2]:
+            results = run_batch(scale, {"factor": 2}, [1, -1, 3], workers=workers)
+            self.assertEqual([r["evaluation"] is None for r in results], [False, True, False])
+            self.assertEqual(results[1]["error"], "ValueError: Invalid submission -1")
+
+    def test_warms_metrics_in_workers(self):
+        for workers in [1, 2]:
+            results = run_batch(loaded_metrics, {}, [0, 1], workers=workers, metrics=["f1"])
+            self.assertTrue(all(r["evaluation"] == [("f1", ())] for r in results))
@@ -0,0 +1,59 @@
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from hf_benchmarks import ListingCache, get_benchmark_repos
+
+from .testing_utils import DUMMY_BENCHMARK_NAME, fake_hub, make_dataset_info
+
+
+class ListingCacheTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ListingCache(cache_dir=self.tmp_dir.name, ttl=60)
+        self.datasets = [make_dataset_info("user/submission-1"), make_dataset_info("user/submission-2")]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get("benchmark:dummy", "token"))
+        self.cache.set("benchmark:dummy", "token", self.datasets)
+        self.assertEqual(self.cache.get("benchmark:dummy", "token"), self.datasets)
+
+    def test_entries_are_scoped_by_token(self):
+        self.cache.set("benchmark:dummy", "token", self.datasets)
+        self.assertIsNone(self.cache.get("benchmark:dummy", "other-token"))
+        self.assertIsNone(self.cache.get("benchmark:dummy", False))
+        # The token itself is never written to disk
+        for path in self.cache.cache_dir.iterdir():
+            self.assertNotIn("token", path.read_text() if path.suffix == ".json" else path.name)
+
+    def test_ttl(self):
+        with patch("hf_benchmarks.cache.time.time", return_value=1000):
+            self.cache.set("benchmark:dummy", "token", self.datasets)
+        with patch("hf_benchmarks.cache.time.time", return_value=1059):
+            self.assertIsNotNone(self.cache.get("benchmark:dummy", "token"))
+        with patch("hf_benchmarks.cache.time.time", return_value=1061):
+            self.assertIsNone(self.cache.get("benchmark:dummy", "token"))
+
+    def test_invalidate(self):
+        self.cache.set("benchmark:dummy", "token", self.datasets)
+        self.cache.set("benchmark:dummy", False, self.datasets)
+        self.cache.set("benchmark:raft", "token", self.datasets)
+        self.cache.invalidate("benchmark:dummy")
+        self.assertIsNone(self.cache.get("benchmark:dummy", "token"))
+        self.assertIsNone(self.cache.get("benchmark:dummy", False))
+        self.assertIsNotNone(self.cache.get("benchmark:raft", "token"))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get("benchmark:raft", "token"))
+
+    def test_get_benchmark_repos_uses_cache(self):
+        with fake_hub(self.datasets, page_size=1) as server:
+            first = get_benchmark_repos(DUMMY_BENCHMARK_NAME, use_auth_token="token", listing_cache=self.cache)
+            num_requests = len(server.requests)
+            second = get_benchmark_repos(DUMMY_BENCHMARK_NAME, use_auth_token="token", listing_cache=self.cache)
+            self.assertEqual(len(server.requests), num_requests)
+            get_benchmark_repos(DUMMY_BENCHMARK_NAME, use_auth_token="token")
+            self.assertGreater(len(server.requests), num_requests)
+        self.assertEqual([s.id for s in first], [s.id for s in second])
@@ -0,0 +1,100 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from datasets import Dataset
+from typer.testing import CliRunner
+
+from benchmarks import Benchmark, registry
+from hf_benchmarks.cli import app
+
+from .testing_utils import fake_hub, make_dataset_info
+
+
+def compute_metrics(evaluation_dataset, submission_dataset, use_auth_token):
+    """The evaluation function of the `echo` benchmark, scored in worker processes."""
+    if submission_dataset.endswith("broken"):
+        raise ValueError("Invalid submission")
+    return {"results": [{"task": {"name": evaluation_dataset, "type": "echo", "metrics": []}}]}
+
+
+class EvaluateCommandTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp_dir.name) / "results" / "echo.jsonl"
+        self.datasets = [
+            make_dataset_info("user/submission", benchmark="echo", submission_name="first"),
+            make_dataset_info("user/broken", benchmark="echo", submission_name="second"),
+            make_dataset_info("user/evaluation", benchmark="echo", repo_type="evaluation"),
+        ]
+        echo = Benchmark(name="echo", evaluation_module="tests.test_cli")
+        self.registry = patch.dict(registry.benchmarks, {"echo": echo})
+        self.registry.start()
+
+    def tearDown(self):
+        self.registry.stop()
+        self.tmp_dir.cleanup()
+
+    def invoke(self, *args):
+        return CliRunner().invoke(app, ["evaluate", *args, "--output", str(self.output)], env={"HF_TOKEN": "token"})
+
+    def test_evaluates_submissions_in_worker_processes(self):
+        with fake_hub(self.datasets, page_size=10):
+            result = self.invoke("echo", "--evaluation-dataset", "user/labels", "--workers", "2")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Evaluated 1 submissions with 1 errors", result.output)
+        rows = [json.loads(line) for line in self.output.read_text().splitlines()]
+        self.assertEqual([row["submission"] for row in rows], ["user/submission", "user/broken"])
+        self.assertEqual([row["submission_name"] for row in rows], ["first", "second"])
+        self.assertEqual(rows[0]["evaluation"]["results"][0]["task"]["name"], "user/labels")
+        self.assertIsNone(rows[0]["error"])
+        self.assertIn("Invalid submission", rows[1]["error"])
+
+    def test_uses_batch_evaluation(self):
+        registry.benchmarks["echo"] = Benchmark(name="echo", evaluation_module="tests.test_cli", batch=True)
+
+        def compute_metrics_batch(evaluation_dataset, submissions, use_auth_token, workers):
+            self.assertEqual((evaluation_dataset, use_auth_token, workers), ("user/labels", "token", 3))
+            return [{"submission": s, "evaluation": {"results": []}, "error": None} for s in submissions]
+
+        with fake_hub(self.datasets, page_size=10), patch(
+            f"{__name__}.compute_metrics_batch", compute_metrics_batch, create=True
+        ):
+            result = self.invoke("echo", "--evaluation-dataset", "user/labels", "--workers", "3")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.output.read_text().splitlines()), 2)
+
+    def test_evaluates_a_registered_batch_benchmark(self):
+        datasets = {
+            "user/labels": Dataset.from_dict({"id": [0, 1, 2, 3], "label": [0, 1, 1, 0]}),
+            "user/dummy-submission": Dataset.from_dict({"id": [3, 2, 1, 0], "label": [0, 1, 1, 0]}),
+        }
+
+        def load_dataset(path, use_auth_token=None, split=None):
+            return datasets[path]
+
+        hub_datasets = [make_dataset_info("user/dummy-submission"), make_dataset_info("user/dummy-missing")]
+        dummy_module = registry.get_benchmark("dummy").load_evaluation()
+        with fake_hub(hub_datasets, page_size=10), patch.object(dummy_module, "load_dataset", load_dataset):
+            result = self.invoke("dummy", "--evaluation-dataset", "user/labels", "--workers", "1")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Evaluated 1 submissions with 1 errors", result.output)
+        rows = [json.loads(line) for line in self.output.read_text().splitlines()]
+        self.assertEqual([row["submission"] for row in rows], ["user/dummy-submission", "user/dummy-missing"])
+        metrics = rows[0]["evaluation"]["results"][0]["task"]["metrics"]
+        self.assertEqual(metrics, [{"name": "f1", "type": "f1", "value": 1.0}])
+        self.assertIn("KeyError", rows[1]["error"])
+
+    def test_refuses_benchmarks_with_submission_fields(self):
+        result = self.invoke("generic_competition", "--evaluation-dataset", "user/labels")
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("user_id, submission_id", result.output)
+        self.assertFalse(self.output.exists())
+
+    def test_unknown_benchmark(self):
+        result = self.invoke("unknown", "--evaluation-dataset", "user/labels")
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("not registered", result.output)
+        self.assertFalse(self.output.exists())
@@ -1,7 +1,15 @@
-import importlib
 import inspect
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict
+from unittest.mock import patch
 
-from benchmarks import registry
+import pytest
+
+from benchmarks import Benchmark, registry
+from benchmarks.registration import BenchmarkRegistry
 
 
 # TODO(lewtun): use common.evaluation.evaluate as reference?
@@ -11,6 +19,61 @@ EVALUATE_ARGS = {"evaluation_dataset", "submission_dataset", "use_auth_token"}
 def test_evaluate_signature():
     benchmarks = registry.list_benchmarks()
     for benchmark in benchmarks:
-        evaluate_module = importlib.import_module(f"benchmarks.{benchmark.name}.evaluation")
-        args = inspect.signature(evaluate_module.compute_metrics).parameters.keys()
+        # Benchmark specific arguments are passed as keyword arguments
+        params = inspect.signature(benchmark.compute_metrics).parameters
+        args = [name for name, param in params.items() if param.kind != inspect.Parameter.VAR_KEYWORD]
         assert len(args) == len(EVALUATE_ARGS) and sorted(args) == sorted(EVALUATE_ARGS)
+        # The submission fields declared by the benchmark are passed as keyword arguments too
+        takes_kwargs = len(args) < len(params)
+        assert takes_kwargs or not benchmark.submission_fields
+        if benchmark.batch:
+            batch_args = list(inspect.signature(benchmark.compute_metrics_batch).parameters)
+            assert batch_args[:3] == ["evaluation_dataset", "submissions", "use_auth_token"]
+            # Every batch entry point takes the same submissions: dicts with the submission dataset and the fields
+            # declared by the benchmark
+            fields = {name: "value" for name in benchmark.submission_fields}
+            submission = {"submission_dataset": "org/submission", **fields}
+            module = benchmark.load_evaluation()
+            score_params = list(inspect.signature(module._score_submission).parameters.values())
+            assert score_params[1].annotation == Dict[str, str], benchmark.name
+            # Not every benchmark has references to load, e.g. gem
+            load_references = patch.object(module, "_load_references", create=True)
+            score_submission = patch.object(module, "_score_submission", return_value={"score": 1.0})
+            with load_references, score_submission as score_submission_mock:
+                results = benchmark.compute_metrics_batch("org/evaluation", [submission], None, workers=1)
+            assert results == [{"submission": submission, "evaluation": {"score": 1.0}, "error": None}]
+            assert score_submission_mock.call_args[0][1] == submission
+
+
+def test_evaluation_modules_are_loaded_on_first_use():
+    # Run in a fresh interpreter, since the other tests import all the evaluation modules
+    code = (
+        "import sys; from benchmarks import registry; "
+        "names = [b.name for b in registry.list_benchmarks()]; "
+        "assert not any(m.startswith('benchmarks.') and m.endswith('.evaluation') for m in sys.modules); "
+        "registry.get_benchmark('generic_competition').compute_metrics; "
+        "print(sorted(m for m in ['datasets', 'evaluate', 'benchmarks.raft.evaluation'] if m in sys.modules))"
+    )
+    root = Path(__file__).resolve().parents[1]
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_batch_requires_capability():
+    with pytest.raises(ValueError, match="does not support batch evaluation"):
+        Benchmark(name="dummy").compute_metrics_batch
+
+
+def test_entry_points_are_discovered_lazily():
+    external = Benchmark(name="external", evaluation_module="benchmarks.dummy.evaluation")
+    entry_point = SimpleNamespace(name="external", load=lambda: external)
+    test_registry = BenchmarkRegistry()
+    test_registry.register_benchmark(Benchmark(name="dummy"))
+    with patch("benchmarks.registration._iter_entry_points", return_value=[entry_point]) as iter_entry_points:
+        assert test_registry.get_benchmark("dummy").name == "dummy"
+        iter_entry_points.assert_not_called()
+        assert test_registry.get_benchmark("external") is external
+        assert [b.name for b in test_registry.list_benchmarks()] == ["dummy", "external"]
+        iter_entry_points.assert_called_once()
+        with pytest.raises(ValueError, match="not registered"):
+            test_registry.get_benchmark("missing")
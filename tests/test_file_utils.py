@@ -0,0 +1,208 @@
+import json
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from hf_benchmarks import file_utils
+from hf_benchmarks.file_utils import ZipMember, _open_raw_member, list_zip_members, load_zip_json, update_zip
+
+
+class UpdateZipTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.archive_path = self.root / "outputs" / "archive.zip"
+        self.files = {}
+        for i in range(5):
+            self.write_file(f"submission-{i}.outputs.json", {"predictions": [f"output {i} {j}" for j in range(500)]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_file(self, arcname, data):
+        path = self.root / "files" / arcname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+        self.files[arcname] = path
+
+    def raw_members(self):
+        with zipfile.ZipFile(self.archive_path) as zf:
+            return {zinfo.filename: _open_raw_member(zf.fp, zinfo).read() for zinfo in zf.infolist()}
+
+    def assert_archive_matches_files(self):
+        with zipfile.ZipFile(self.archive_path) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), list(self.files))
+            for arcname, path in self.files.items():
+                self.assertEqual(zf.read(arcname), path.read_bytes())
+                self.assertEqual(zf.getinfo(arcname).compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_creates_archive(self):
+        stats = update_zip(self.archive_path, self.files)
+        self.assertEqual(stats, {"copied": 0, "compressed": 5, "removed": 0})
+        self.assert_archive_matches_files()
+        manifest = json.loads(Path(f"{self.archive_path}.manifest.json").read_text())
+        self.assertEqual(set(manifest), set(self.files))
+
+    def check_only_compresses_changed_files(self, workers):
+        update_zip(self.archive_path, self.files, workers=workers)
+        raw_members = self.raw_members()
+        self.write_file("submission-1.outputs.json", {"predictions": ["updated"]})
+        self.write_file("submission-5.outputs.json", {"predictions": ["new"]})
+        del self.files["submission-3.outputs.json"]
+        stats = update_zip(self.archive_path, self.files, workers=workers)
+        self.assertEqual(stats, {"copied": 3, "compressed": 2, "removed": 1})
+        self.assert_archive_matches_files()
+        # Unchanged members are copied byte for byte
+        new_raw_members = self.raw_members()
+        for arcname in ["submission-0.outputs.json", "submission-2.outputs.json", "submission-4.outputs.json"]:
+            self.assertEqual(new_raw_members[arcname], raw_members[arcname])
+
+    def test_only_compresses_changed_files(self):
+        self.check_only_compresses_changed_files(workers=1)
+
+    def test_only_compresses_changed_files_in_parallel(self):
+        self.check_only_compresses_changed_files(workers=4)
+
+    def test_compresses_a_bounded_number_of_files_ahead(self):
+        for i in range(5, 30):
+            self.write_file(f"submission-{i}.outputs.json", {"predictions": [f"output {i}"]})
+        lock = threading.Lock()
+        num_compressed, num_ahead = [0], []
+        compress_file, write_raw_member = file_utils._compress_file, file_utils._write_raw_member
+
+        def counting_compress_file(path, compresslevel):
+            data = compress_file(path, compresslevel)
+            with lock:
+                num_compressed[0] += 1
+            return data
+
+        def counting_write_raw_member(zf, zinfo, data):
+            with lock:
+                num_ahead.append(num_compressed[0] - len(zf.filelist))
+            write_raw_member(zf, zinfo, data)
+
+        with patch.object(file_utils, "_compress_file", counting_compress_file), patch.object(
+            file_utils, "_write_raw_member", counting_write_raw_member
+        ):
+            update_zip(self.archive_path, self.files, workers=2)
+        self.assert_archive_matches_files()
+        # Two files per worker are compressed ahead of the one being written
+        self.assertLessEqual(max(num_ahead), 2 * 2 + 1)
+
+    def test_incremental_without_manifest(self):
+        # E.g. an archive downloaded from the Hub on a fresh machine
+        self.archive_path.parent.mkdir()
+        with zipfile.ZipFile(self.archive_path, "w") as zf:
+            for arcname, path in self.files.items():
+                zf.write(path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+        self.write_file("submission-0.outputs.json", {"predictions": ["updated"]})
+        stats = update_zip(self.archive_path, self.files)
+        self.assertEqual(stats, {"copied": 4, "compressed": 1, "removed": 0})
+        self.assert_archive_matches_files()
+
+    def test_stale_manifest(self):
+        update_zip(self.archive_path, self.files)
+        # Replace the archive behind the manifest's back
+        with zipfile.ZipFile(self.archive_path, "w") as zf:
+            for arcname in self.files:
+                zf.writestr(arcname, "stale", compress_type=zipfile.ZIP_DEFLATED)
+        stats = update_zip(self.archive_path, self.files)
+        self.assertEqual(stats, {"copied": 0, "compressed": 5, "removed": 0})
+        self.assert_archive_matches_files()
+
+    def test_stored_members_are_copied(self):
+        self.archive_path.parent.mkdir()
+        with zipfile.ZipFile(self.archive_path, "w") as zf:
+            for arcname, path in self.files.items():
+                zf.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+        stats = update_zip(self.archive_path, self.files)
+        self.assertEqual(stats, {"copied": 5, "compressed": 0, "removed": 0})
+        with zipfile.ZipFile(self.archive_path) as zf:
+            self.assertIsNone(zf.testzip())
+            for arcname, path in self.files.items():
+                self.assertEqual(zf.read(arcname), path.read_bytes())
+
+    def test_failed_update_keeps_previous_archive(self):
+        update_zip(self.archive_path, self.files)
+        before = self.archive_path.read_bytes()
+        self.files["missing.json"] = self.root / "missing.json"
+        with self.assertRaises(FileNotFoundError):
+            update_zip(self.archive_path, self.files)
+        self.assertEqual(self.archive_path.read_bytes(), before)
+        self.assertEqual(list(self.archive_path.parent.glob("*.zip")), [self.archive_path])
+
+
+class ZipReaderTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.source_path = self.root / "gem-v1.zip"
+        self.contents = {
+            "gem-v1/a.scores.json": {"submission_name": "a", "bleu": 0.5},
+            "gem-v1/a.outputs.json": {"predictions": ["output"] * 1000},
+            "gem-v1/b.scores.json": {"submission_name": "b", "bleu": 0.25},
+            "gem-v1/nested/c.scores.json": {"submission_name": "c", "bleu": 0.75},
+            "README.md": "Not JSON",
+        }
+        with zipfile.ZipFile(self.source_path, "w") as zf:
+            for name, content in self.contents.items():
+                data = content if isinstance(content, str) else json.dumps(content)
+                # Mix compression methods, as archives built by other tools may do
+                compress_type = zipfile.ZIP_STORED if name.startswith("gem-v1/b") else zipfile.ZIP_DEFLATED
+                zf.writestr(name, data, compress_type=compress_type)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_zip_json(self):
+        scores = load_zip_json(self.source_path, "gem-v1/*.scores.json")
+        self.assertEqual(list(scores), ["gem-v1/a.scores.json", "gem-v1/b.scores.json"])
+        self.assertEqual(scores["gem-v1/b.scores.json"], self.contents["gem-v1/b.scores.json"])
+        self.assertEqual(len(load_zip_json(self.source_path, "gem-v1/*.json")), 3)
+        # Like `Path.glob`, wildcards do not match members of subdirectories
+        self.assertEqual(load_zip_json(self.source_path), {})
+
+    def test_list_zip_members(self):
+        members = list_zip_members(self.source_path, "gem-v1/*.outputs.json")
+        self.assertEqual(members, [ZipMember(self.source_path, "gem-v1/a.outputs.json")])
+        self.assertEqual(list_zip_members(self.source_path, "*.outputs.json"), [])
+        members = list_zip_members(self.source_path, "gem-v1/*/*.json")
+        self.assertEqual(members, [ZipMember(self.source_path, "gem-v1/nested/c.scores.json")])
+
+    def test_members_are_copied_without_recompression(self):
+        archive_path = self.root / "archive.zip"
+        files = {Path(m.name).name: m for m in list_zip_members(self.source_path, "gem-v1/*")}
+        new_file = self.root / "c.scores.json"
+        new_file.write_text(json.dumps({"submission_name": "c"}))
+        files["c.scores.json"] = new_file
+        # Copy the members in several chunks
+        with patch.object(file_utils, "_CHUNK_SIZE", 16):
+            stats = update_zip(archive_path, files)
+        self.assertEqual(stats, {"copied": 3, "compressed": 1, "removed": 0})
+        with zipfile.ZipFile(self.source_path) as source, zipfile.ZipFile(archive_path) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), ["a.scores.json", "a.outputs.json", "b.scores.json", "c.scores.json"])
+            for name in ["a.scores.json", "a.outputs.json", "b.scores.json"]:
+                source_info, info = source.getinfo(f"gem-v1/{name}"), zf.getinfo(name)
+                self.assertEqual(info.compress_type, source_info.compress_type)
+                self.assertEqual(_open_raw_member(zf.fp, info).read(), _open_raw_member(source.fp, source_info).read())
+            self.assertEqual(json.loads(zf.read("c.scores.json")), {"submission_name": "c"})
+        # Updating again from the same sources leaves the archive content unchanged
+        stats = update_zip(archive_path, files)
+        self.assertEqual(stats, {"copied": 4, "compressed": 0, "removed": 0})
+
+    def test_members_with_other_compression_are_recompressed(self):
+        with zipfile.ZipFile(self.source_path, "a") as zf:
+            zf.writestr("gem-v1/d.scores.json", json.dumps({"submission_name": "d"}), zipfile.ZIP_BZIP2)
+        archive_path = self.root / "archive.zip"
+        files = {Path(m.name).name: m for m in list_zip_members(self.source_path, "gem-v1/*")}
+        stats = update_zip(archive_path, files)
+        self.assertEqual(stats, {"copied": 3, "compressed": 1, "removed": 0})
+        with zipfile.ZipFile(archive_path) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.getinfo("d.scores.json").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(json.loads(zf.read("d.scores.json")), {"submission_name": "d"})
@@ -0,0 +1,112 @@
+import importlib
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+
+def fake_gem_metrics():
+    """Mimics the gem_metrics CLI: scores the submission file given in `sys.argv` and writes the output file."""
+    submission_filepath, _, metrics_filepath = sys.argv[1:]
+    with open(submission_filepath) as f:
+        submission = json.load(f)
+    if submission["submission_name"] == "broken":
+        print("Traceback: invalid submission")
+        sys.exit(1)
+    print("Computing metrics...")
+    time.sleep(0.01)
+    with open(metrics_filepath, "w") as f:
+        json.dump({"submission_name": submission["submission_name"], "metrics_path": metrics_filepath}, f)
+
+
+# Runs `fake_gem_metrics` in its own process, like the gem_metrics console script
+FAKE_GEM_METRICS_COMMAND = [
+    sys.executable,
+    "-c",
+    f"import sys; sys.path.insert(0, {str(Path(__file__).resolve().parents[1])!r}); "
+    "from tests.test_gem_benchmark import fake_gem_metrics; fake_gem_metrics()",
+]
+
+
+class GemBenchmarkTest(TestCase):
+    def setUp(self):
+        self.eval_module = importlib.import_module("benchmarks.gem.evaluation")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metrics_dir = Path(self.tmp_dir.name) / "metrics"
+        self.metrics_dir.mkdir()
+        self.patches = [
+            patch.object(self.eval_module, "GEM_METRICS_COMMAND", FAKE_GEM_METRICS_COMMAND),
+            patch.object(self.eval_module, "_gem_metrics_main", fake_gem_metrics),
+            patch.object(self.eval_module, "METRICS_DIR", str(self.metrics_dir)),
+            patch.object(self.eval_module, "hf_hub_download", self.hf_hub_download),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    def hf_hub_download(self, repo_id, filename, repo_type, use_auth_token):
+        path = Path(self.tmp_dir.name) / repo_id / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"submission_name": repo_id}))
+        return str(path)
+
+    def test_compute_metrics(self):
+        metrics = self.eval_module.compute_metrics("GEM/references", "my-submission", use_auth_token="token")
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]["submission_name"], "my-submission")
+        # Outputs are written below the metrics directory and removed once read
+        self.assertTrue(metrics[0]["metrics_path"].startswith(str(self.metrics_dir)))
+        self.assertEqual(list(self.metrics_dir.iterdir()), [])
+
+    def test_concurrent_submissions_do_not_overwrite_each_other(self):
+        submissions = [f"submission-{i}" for i in range(8)]
+        argv = list(sys.argv)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            metrics = list(
+                executor.map(lambda s: self.eval_module.compute_metrics("GEM/references", s, "token"), submissions)
+            )
+        self.assertEqual([m[0]["submission_name"] for m in metrics], submissions)
+        self.assertEqual(len({m[0]["metrics_path"] for m in metrics}), len(submissions))
+        self.assertEqual(sys.argv, argv)
+
+    def test_raises_on_non_zero_exit_code(self):
+        with self.assertRaisesRegex(ValueError, "exited with code 1: Traceback: invalid submission"):
+            self.eval_module.compute_metrics("GEM/references", "broken", "token")
+
+    def test_compute_metrics_batch(self):
+        submissions = [{"submission_dataset": name} for name in ["first", "broken", "second"]]
+        results = self.eval_module.compute_metrics_batch("GEM/references", submissions, "token", workers=1)
+        self.assertEqual([r["submission"] for r in results], submissions)
+        self.assertEqual(results[0]["evaluation"][0]["submission_name"], "first")
+        self.assertIn("exited with code 1", results[1]["error"])
+        self.assertEqual(results[2]["evaluation"][0]["submission_name"], "second")
+
+    def test_batch_workers_run_gem_metrics_in_process(self):
+        submissions = [{"submission_dataset": "first"}]
+        with patch.object(self.eval_module, "run_batch") as run_batch:
+            self.eval_module.compute_metrics_batch("GEM/references", submissions, "token", workers=2)
+            score_fn = run_batch.call_args[0][0]
+            self.assertIs(score_fn.keywords["run_gem_metrics"], self.eval_module._run_gem_metrics_in_process)
+            self.eval_module.compute_metrics_batch("GEM/references", submissions, "token", workers=1)
+            score_fn = run_batch.call_args[0][0]
+            self.assertIs(score_fn.keywords["run_gem_metrics"], self.eval_module._run_gem_metrics)
+
+    def test_in_process_run_restores_process_state(self):
+        argv = list(sys.argv)
+        metrics = self.eval_module._score_submission(
+            None, {"submission_dataset": "first"}, "token", self.eval_module._run_gem_metrics_in_process
+        )
+        self.assertEqual(metrics[0]["submission_name"], "first")
+        with self.assertRaisesRegex(ValueError, "exited with code 1: Traceback: invalid submission"):
+            self.eval_module._score_submission(
+                None, {"submission_dataset": "broken"}, "token", self.eval_module._run_gem_metrics_in_process
+            )
+        self.assertEqual(sys.argv, argv)
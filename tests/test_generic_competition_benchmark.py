@@ -0,0 +1,174 @@
+import importlib
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+
+
+class GenericCompetitionBenchmarkTest(TestCase):
+    def setUp(self):
+        self.eval_module = importlib.import_module("benchmarks.generic_competition.evaluation")
+        self.ground_truth_module = importlib.import_module("benchmarks.generic_competition.ground_truth")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.files = {}
+        self.downloads = []
+        rng = np.random.default_rng(0)
+        num_rows = 100
+        solution = pd.DataFrame(
+            {
+                "id": np.arange(num_rows),
+                "target": rng.integers(0, 2, size=num_rows),
+                "split": np.where(np.arange(num_rows) % 3 == 0, "private", "public"),
+            }
+        )
+        submission = pd.DataFrame({"id": solution["id"], "target": rng.integers(0, 2, size=num_rows)})
+        self.solution, self.submission = solution, submission
+        self.write_file("solution.csv", solution)
+        self.write_file("conf.json", {"EVAL_METRIC": "f1_score"})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        self.ground_truth_module.GROUND_TRUTH_CACHE.clear()
+
+    def write_file(self, filename, data):
+        if filename in ["solution.csv", "conf.json"]:
+            self.ground_truth_module.GROUND_TRUTH_CACHE.clear()
+        path = Path(self.tmp_dir.name) / filename.replace("/", "_")
+        if isinstance(data, pd.DataFrame):
+            data.to_csv(path, index=False)
+        else:
+            path.write_text(json.dumps(data))
+        self.files[filename] = str(path)
+
+    def download(self, filename, **kwargs):
+        self.downloads.append(filename)
+        return self.files[filename]
+
+    def compute_metrics(self, submission, **kwargs):
+        self.write_file("submissions/user-submission.csv", submission)
+        download = patch.object(self.eval_module, "hf_hub_download", side_effect=self.download)
+        with download, patch.object(self.ground_truth_module, "hf_hub_download", side_effect=self.download):
+            return self.eval_module.compute_metrics(
+                "org/solution",
+                "org/submissions",
+                use_auth_token=None,
+                user_id="user",
+                submission_id="submission",
+                **kwargs,
+            )
+
+    def test_compute_metrics(self):
+        results = self.compute_metrics(self.submission)
+        public = self.solution["split"] == "public"
+        expected_public = f1_score(self.solution["target"][public], self.submission["target"][public])
+        expected_private = f1_score(self.solution["target"][~public], self.submission["target"][~public])
+        self.assertAlmostEqual(results["public_score"], expected_public)
+        self.assertAlmostEqual(results["private_score"], expected_private)
+
+    def test_rows_are_aligned_by_id(self):
+        results = self.compute_metrics(self.submission)
+        shuffled = self.submission.sample(frac=1, random_state=0)[["target", "id"]]
+        self.assertEqual(self.compute_metrics(shuffled), results)
+
+    def test_missing_ids(self):
+        with self.assertRaisesRegex(ValueError, "missing 2 ids"):
+            self.compute_metrics(self.submission.iloc[2:])
+
+    def test_duplicate_ids(self):
+        with self.assertRaisesRegex(ValueError, "duplicate ids"):
+            self.compute_metrics(pd.concat([self.submission, self.submission.iloc[:1]]))
+
+    def test_extra_ids(self):
+        extra = pd.DataFrame({"id": [1000], "target": [1]})
+        with self.assertWarns(UserWarning):
+            results = self.compute_metrics(pd.concat([extra, self.submission]))
+        self.assertEqual(results, self.compute_metrics(self.submission))
+
+    def test_streaming_classification_metrics(self):
+        for metric in ["f1_score", "accuracy_score", "matthews_corrcoef"]:
+            self.write_file("conf.json", {"EVAL_METRIC": metric})
+            expected = self.compute_metrics(self.submission)
+            with patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+                results = self.compute_metrics(self.submission, chunksize=7)
+            # Both files are only read in chunks
+            self.assertTrue(all(call.kwargs.get("chunksize") == 7 for call in read_csv.call_args_list))
+            for split, score in expected.items():
+                self.assertAlmostEqual(results[split], score, msg=metric)
+
+    def test_streaming_regression_metrics(self):
+        rng = np.random.default_rng(1)
+        num_rows = 50
+        solution = pd.DataFrame(
+            {
+                "id": np.arange(num_rows),
+                "y1": rng.normal(size=num_rows),
+                "y2": rng.normal(size=num_rows),
+                "split": np.where(np.arange(num_rows) % 2 == 0, "private", "public"),
+            }
+        )
+        submission = solution[["id", "y1", "y2"]].copy()
+        submission[["y1", "y2"]] += rng.normal(scale=0.1, size=(num_rows, 2))
+        self.write_file("solution.csv", solution)
+        for metric in ["mean_squared_error", "mean_absolute_error", "r2_score"]:
+            self.write_file("conf.json", {"EVAL_METRIC": metric})
+            expected = self.compute_metrics(submission)
+            results = self.compute_metrics(submission, chunksize=8)
+            for split, score in expected.items():
+                self.assertAlmostEqual(results[split], score, msg=metric)
+
+    def test_streaming_falls_back_to_full_load(self):
+        shuffled = self.submission.sample(frac=1, random_state=0)
+        self.assertEqual(self.compute_metrics(shuffled, chunksize=10), self.compute_metrics(self.submission))
+        self.write_file("conf.json", {"EVAL_METRIC": "roc_auc_score"})
+        self.assertEqual(self.compute_metrics(self.submission, chunksize=10), self.compute_metrics(self.submission))
+
+    def test_ground_truth_is_cached(self):
+        results = self.compute_metrics(self.submission)
+        self.downloads.clear()
+        with patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+            for _ in range(3):
+                self.assertEqual(self.compute_metrics(self.submission), results)
+        # Only the submissions are parsed
+        self.assertEqual(
+            [call.args[0] for call in read_csv.call_args_list], [self.files["submissions/user-submission.csv"]] * 3
+        )
+        self.assertEqual(self.downloads, ["submissions/user-submission.csv"] * 3)
+        # Another revision of the solution is cached separately
+        self.compute_metrics(self.submission, revision="abc123")
+        self.assertEqual(len(self.ground_truth_module.GROUND_TRUTH_CACHE), 2)
+
+    def test_ground_truth_cache_eviction(self):
+        cache = self.ground_truth_module.GroundTruthCache(max_entries=2)
+        download = patch.object(self.ground_truth_module, "hf_hub_download", side_effect=self.download)
+        with download:
+            first = cache.get("org/solution", None, revision="1")
+            cache.get("org/solution", None, revision="2")
+            # Using the first entry makes the second one the least recently used
+            self.assertIs(cache.get("org/solution", None, revision="1"), first)
+            cache.get("org/solution", None, revision="3")
+        self.assertEqual(list(cache._entries), [("org/solution", "1"), ("org/solution", "3")])
+        cache = self.ground_truth_module.GroundTruthCache(max_bytes=first.nbytes * 2)
+        with download:
+            for revision in ["1", "2", "3"]:
+                cache.get("org/solution", None, revision=revision)
+        self.assertEqual(len(cache), 2)
+
+    def test_compute_metrics_batch(self):
+        expected = self.compute_metrics(self.submission)
+        submissions = [
+            {"submission_dataset": "org/submissions", "user_id": "user", "submission_id": "submission"},
+            {"submission_dataset": "org/submissions", "user_id": "user", "submission_id": "missing"},
+        ]
+        download = patch.object(self.eval_module, "hf_hub_download", side_effect=self.download)
+        with download, patch.object(self.ground_truth_module, "hf_hub_download", side_effect=self.download):
+            results = self.eval_module.compute_metrics_batch("org/solution", submissions, None, workers=1)
+        self.assertEqual([r["submission"] for r in results], submissions)
+        self.assertEqual(results[0]["evaluation"], expected)
+        self.assertIsNone(results[0]["error"])
+        self.assertIsNone(results[1]["evaluation"])
+        self.assertIn("KeyError", results[1]["error"])
@@ -1,12 +1,40 @@
+import hashlib
 import os
+import tempfile
+import time
+from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
 import pandas as pd
+import requests
 from huggingface_hub import HfFolder
 
-from hf_benchmarks import get_benchmark_repos
+from hf_benchmarks import (
+    AutoTrainClient,
+    ProjectStatusPoller,
+    UnreachableAPIError,
+    download_repo_files,
+    get_benchmark_repos,
+    get_benchmark_repos_by_type,
+    get_repo_file_hashes,
+    is_time_between,
+    is_time_between_batch,
+    iter_benchmark_repos,
+    push_changed_files,
+    sync_repo_file,
+)
 
-from .testing_utils import BOGUS_BENCHMARK_NAME, DUMMY_BENCHMARK_NAME, DUMMY_EVALUATION_ID, DUMMY_SUBMISSION_ID
+from .testing_utils import (
+    BOGUS_BENCHMARK_NAME,
+    DUMMY_BENCHMARK_NAME,
+    DUMMY_EVALUATION_ID,
+    DUMMY_SUBMISSION_ID,
+    FakeAutoTrainServer,
+    fake_hub,
+    make_dataset_info,
+    stalled_hub,
+)
 
 
 class GetBenchmarkReposTest(TestCase):
@@ -60,3 +88,343 @@ class GetBenchmarkReposTest(TestCase):
             end_date=end_date,
         )
         self.assertEqual(len(data), 0)
+
+
+class ProjectStatusPollerTest(TestCase):
+    def test_resolves_when_projects_are_ready(self):
+        ready = []
+        with FakeAutoTrainServer({1: 0, 2: 2, 3: 4}) as server:
+            with ProjectStatusPoller(
+                token="fake", domain=server.url, initial_interval=0.01, max_interval=0.05, max_requests_per_second=500
+            ) as poller:
+                futures = {
+                    project_id: poller.watch(project_id, callback=lambda pid, status: ready.append(pid))
+                    for project_id in [1, 2, 3]
+                }
+                statuses = {project_id: future.result(timeout=10) for project_id, future in futures.items()}
+
+        self.assertEqual({pid: status["status"] for pid, status in statuses.items()}, {1: 3, 2: 3, 3: 3})
+        self.assertCountEqual(ready, [1, 2, 3])
+        # Each project is polled until ready and then never again
+        self.assertEqual(len(server.requests), 1 + 3 + 5)
+        self.assertEqual(poller.num_requests, len(server.requests))
+
+    def test_request_budget_is_shared_across_projects(self):
+        with FakeAutoTrainServer({project_id: 1 for project_id in range(5)}) as server:
+            with ProjectStatusPoller(
+                token="fake", domain=server.url, initial_interval=0, max_interval=0, max_requests_per_second=50
+            ) as poller:
+                start = time.monotonic()
+                for future in [poller.watch(project_id) for project_id in range(5)]:
+                    future.result(timeout=10)
+                elapsed = time.monotonic() - start
+
+        # 10 requests at no more than 50 requests per second
+        self.assertEqual(len(server.requests), 10)
+        self.assertGreaterEqual(elapsed, 9 / 50)
+
+    def test_unknown_project_raises_after_max_errors(self):
+        with FakeAutoTrainServer({}) as server:
+            with ProjectStatusPoller(
+                token="fake", domain=server.url, initial_interval=0, max_requests_per_second=500, max_errors=2
+            ) as poller:
+                future = poller.watch(42)
+                with self.assertRaises(requests.HTTPError):
+                    future.result(timeout=10)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_unwatched_projects_are_not_polled(self):
+        with FakeAutoTrainServer({1: 1000, 2: 3}) as server:
+            with ProjectStatusPoller(
+                token="fake", domain=server.url, initial_interval=0.05, max_interval=0.05, max_requests_per_second=500
+            ) as poller:
+                stuck, ready = poller.watch(1), poller.watch(2)
+                poller.unwatch(1)
+                self.assertTrue(stuck.cancelled())
+                self.assertEqual(ready.result(timeout=10)["status"], 3)
+        self.assertEqual(server.requests, [("GET", "/projects/2")] * 4)
+
+    def test_malformed_status_only_fails_its_project(self):
+        # The first status request is answered with a payload that has no `status` field
+        with FakeAutoTrainServer({1: 0, 2: 1}, errors=[(200, {})]) as server:
+            with ProjectStatusPoller(
+                token="fake", domain=server.url, initial_interval=0, max_interval=0, max_requests_per_second=500
+            ) as poller:
+                failed, ready = poller.watch(1), poller.watch(2)
+                with self.assertRaises(KeyError):
+                    failed.result(timeout=10)
+                self.assertEqual(ready.result(timeout=10)["status"], 3)
+
+
+class AutoTrainClientTest(TestCase):
+    def test_reuses_connections(self):
+        with FakeAutoTrainServer({1: 0}) as server:
+            client = AutoTrainClient(domain=server.url, token="fake")
+            for _ in range(3):
+                self.assertEqual(client.get("/projects/1").json()["status"], 3)
+            response = client.post("/projects/create", payload={"proj_name": "test"})
+
+        self.assertEqual(response.json()["payload"], {"proj_name": "test"})
+        self.assertEqual(len(server.client_ports), 1)
+        self.assertEqual(client.stats["GET /projects/{id}"]["calls"], 3)
+        self.assertEqual(client.stats["POST /projects/create"]["calls"], 1)
+
+    def test_retries_transient_errors(self):
+        errors = [(503, {}), (429, {"Retry-After": "0"})]
+        with FakeAutoTrainServer({1: 0}, errors=errors) as server:
+            client = AutoTrainClient(domain=server.url, token="fake", backoff_factor=0)
+            response = client.get("/projects/1")
+
+        self.assertEqual(response.json()["status"], 3)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(client.stats["GET /projects/{id}"]["errors"], 2)
+
+    def test_raises_when_retries_are_exhausted(self):
+        with FakeAutoTrainServer({1: 0}, errors=[(500, {})] * 3) as server:
+            client = AutoTrainClient(domain=server.url, token="fake", max_retries=2, backoff_factor=0)
+            with self.assertRaises(requests.HTTPError):
+                client.get("/projects/1")
+        self.assertEqual(len(server.requests), 3)
+
+    def test_does_not_retry_client_errors(self):
+        with FakeAutoTrainServer({}) as server:
+            client = AutoTrainClient(domain=server.url, token="fake", backoff_factor=0)
+            with self.assertRaises(requests.HTTPError):
+                client.get("/projects/1")
+        self.assertEqual(len(server.requests), 1)
+
+    def test_does_not_replay_posts_after_server_errors(self):
+        with FakeAutoTrainServer({}, errors=[(503, {})]) as server:
+            client = AutoTrainClient(domain=server.url, token="fake", backoff_factor=0)
+            with self.assertRaises(requests.HTTPError):
+                client.post("/projects/create", payload={"proj_name": "test"})
+        self.assertEqual(server.requests, [("POST", "/projects/create")])
+
+    def test_retries_rate_limited_posts(self):
+        with FakeAutoTrainServer({}, errors=[(429, {"Retry-After": "0"})]) as server:
+            client = AutoTrainClient(domain=server.url, token="fake", backoff_factor=0)
+            response = client.post("/projects/create", payload={"proj_name": "test"})
+        self.assertEqual(response.json()["payload"], {"proj_name": "test"})
+        self.assertEqual(len(server.requests), 2)
+
+    def test_unreachable_api(self):
+        with FakeAutoTrainServer() as server:
+            url = server.url
+        client = AutoTrainClient(domain=url, token="fake", max_retries=1, backoff_factor=0)
+        with self.assertRaises(UnreachableAPIError):
+            client.get("/projects/1")
+        # The connection is refused before a POST is sent, so it is safe to retry
+        with self.assertRaises(UnreachableAPIError):
+            client.post("/projects/create")
+        self.assertEqual(client.stats["POST /projects/create"]["calls"], 2)
+
+
+class IterBenchmarkReposTest(TestCase):
+    def setUp(self):
+        self.datasets = [
+            make_dataset_info("user/submission-1", last_modified="2022-06-20T12:00:00.000Z"),
+            make_dataset_info("user/template", submission_name="none"),
+            make_dataset_info("user/evaluation", repo_type="evaluation"),
+            make_dataset_info("user/submission-2", last_modified="2022-06-25T12:00:00.000Z"),
+            make_dataset_info("user/other-benchmark", benchmark="raft"),
+            make_dataset_info("user/submission-3", last_modified="2022-06-21T12:00:00.000Z"),
+        ]
+
+    def test_pages_lazily(self):
+        with fake_hub(self.datasets, page_size=2) as server:
+            submissions = iter_benchmark_repos(DUMMY_BENCHMARK_NAME)
+            self.assertEqual(next(submissions).id, "user/submission-1")
+            # Only the first page has been fetched so far
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual([s.id for s in submissions], ["user/submission-2", "user/submission-3"])
+            self.assertEqual(len(server.requests), 3)
+
+    def test_filters_match_get_benchmark_repos(self):
+        with fake_hub(self.datasets, page_size=2):
+            kwargs = dict(repo_type="prediction", start_date="2022-06-19", end_date="2022-06-22")
+            streamed = [s.id for s in iter_benchmark_repos(DUMMY_BENCHMARK_NAME, **kwargs)]
+            listed = [s.id for s in get_benchmark_repos(DUMMY_BENCHMARK_NAME, **kwargs)]
+            evaluation = [s.id for s in iter_benchmark_repos(DUMMY_BENCHMARK_NAME, repo_type="evaluation")]
+        self.assertEqual(streamed, ["user/submission-1", "user/submission-3"])
+        self.assertEqual(streamed, listed)
+        self.assertEqual(evaluation, ["user/evaluation"])
+
+    def test_by_type_uses_a_single_listing(self):
+        with fake_hub(self.datasets, page_size=10) as server:
+            repos = get_benchmark_repos_by_type(DUMMY_BENCHMARK_NAME)
+            self.assertEqual(len(server.requests), 1)
+            for repo_type in ["prediction", "evaluation", "model"]:
+                expected = [s.id for s in get_benchmark_repos(DUMMY_BENCHMARK_NAME, repo_type=repo_type)]
+                self.assertEqual([s.id for s in repos[repo_type]], expected)
+        self.assertEqual(len(repos["prediction"]), 3)
+
+    def test_stalled_listing_times_out(self):
+        with stalled_hub(), patch("hf_benchmarks.hub.HUB_TIMEOUT", (1, 0.1)):
+            with self.assertRaises(requests.exceptions.Timeout):
+                next(iter_benchmark_repos(DUMMY_BENCHMARK_NAME))
+
+
+class DownloadRepoFilesTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp_dir.name)
+        self.datasets = [make_dataset_info(f"user/submission-{i}", sha=f"{i}" * 40) for i in range(6)]
+        self.files = {(d["id"], d["sha"], "submission.json"): d["id"].encode() for d in self.datasets}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def downloads(self, server):
+        return [path for method, path in server.requests if "/resolve/" in path]
+
+    def test_downloads_once_per_sha(self):
+        with fake_hub(self.datasets, page_size=10, files=self.files) as server:
+            repos = get_benchmark_repos(DUMMY_BENCHMARK_NAME)
+            paths = download_repo_files(repos, "submission.json", self.cache_dir, max_workers=3)
+            self.assertEqual(list(paths), [d["id"] for d in self.datasets])
+            for repo_id, path in paths.items():
+                self.assertEqual(path.read_bytes(), repo_id.encode())
+            self.assertEqual(len(self.downloads(server)), 6)
+            # Unchanged repos are served from the cache
+            self.assertEqual(download_repo_files(repos, "submission.json", self.cache_dir), paths)
+            self.assertEqual(len(self.downloads(server)), 6)
+            # A new commit is downloaded again
+            server.datasets[0] = make_dataset_info("user/submission-0", sha="a" * 40)
+            server.files[("user/submission-0", "a" * 40, "submission.json")] = b"updated"
+            repos = get_benchmark_repos(DUMMY_BENCHMARK_NAME)
+            new_paths = download_repo_files(repos, "submission.json", self.cache_dir)
+            expected_url = f"/datasets/user/submission-0/resolve/{'a' * 40}/submission.json"
+            self.assertEqual(self.downloads(server)[6:], [expected_url])
+            self.assertEqual(new_paths["user/submission-0"].read_bytes(), b"updated")
+
+    def test_raises_on_missing_file(self):
+        del self.files[("user/submission-3", "3" * 40, "submission.json")]
+        with fake_hub(self.datasets, page_size=10, files=self.files):
+            repos = get_benchmark_repos(DUMMY_BENCHMARK_NAME)
+            with self.assertRaises(requests.HTTPError):
+                download_repo_files(repos, "submission.json", self.cache_dir)
+        # No partial download is left behind for the missing file
+        files = [p for p in (self.cache_dir / "user--submission-3").rglob("*") if p.is_file()]
+        self.assertEqual(files, [])
+
+    def test_stalled_download_times_out(self):
+        with fake_hub(self.datasets[:1], page_size=10, files=self.files):
+            repos = get_benchmark_repos(DUMMY_BENCHMARK_NAME)
+        with stalled_hub(), patch("hf_benchmarks.hub.HUB_TIMEOUT", (1, 0.1)):
+            with self.assertRaises(requests.exceptions.Timeout):
+                download_repo_files(repos, "submission.json", self.cache_dir)
+
+
+class PushChangedFilesTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.repo_id = "GEM-submissions/submission-scores"
+        self.remote_files = {
+            (self.repo_id, "main", "scores.json"): b'{"bleu": 0.5}',
+            (self.repo_id, "main", "outputs.zip"): b"zip" * 1000,
+            (self.repo_id, "main", "README.md"): b"# Scores",
+        }
+        self.files = {}
+        for filename in ["scores.json", "outputs.zip"]:
+            self.write_file(filename, self.remote_files[(self.repo_id, "main", filename)])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_file(self, filename, content):
+        path = self.root / filename
+        path.write_bytes(content)
+        self.files[filename] = path
+
+    def test_skips_unchanged_files(self):
+        with fake_hub(files=self.remote_files) as server:
+            changed = push_changed_files(self.repo_id, self.files, "Update", use_auth_token="token")
+        self.assertEqual(changed, [])
+        self.assertEqual(server.commits, [])
+        self.assertEqual([method for method, _ in server.requests], ["GET"])
+
+    def test_commits_changed_files_once(self):
+        self.write_file("scores.json", b'{"bleu": 0.25}')
+        self.write_file("outputs.zip", b"new zip" * 1000)
+        self.write_file("filtered_scores.json", b"{}")
+        with fake_hub(files=self.remote_files) as server:
+            changed = push_changed_files(self.repo_id, self.files, "Update", use_auth_token="token")
+            self.assertEqual(changed, ["scores.json", "outputs.zip", "filtered_scores.json"])
+            self.assertEqual(len(server.commits), 1)
+            _, payload = server.commits[0]
+            self.assertEqual([f["path"] for f in payload["files"]], ["scores.json", "filtered_scores.json"])
+            self.assertEqual([f["path"] for f in payload["lfsFiles"]], ["outputs.zip"])
+            for filename, path in self.files.items():
+                self.assertEqual(server.files[(self.repo_id, "main", filename)], path.read_bytes())
+            # Files that are not pushed are left untouched
+            self.assertEqual(server.files[(self.repo_id, "main", "README.md")], b"# Scores")
+            # Pushing again is a no-op
+            self.assertEqual(push_changed_files(self.repo_id, self.files, "Update", use_auth_token="token"), [])
+            self.assertEqual(len(server.commits), 1)
+
+    def test_fails_on_concurrent_commit(self):
+        self.write_file("scores.json", b'{"bleu": 0.25}')
+        with fake_hub(files=self.remote_files) as server:
+            listed = server.repo_info
+
+            def repo_info_then_commit(repo_id):
+                info = listed(repo_id)
+                server.repo_shas[repo_id] = "f" * 40
+                return info
+
+            server.repo_info = repo_info_then_commit
+            with self.assertRaises(requests.HTTPError):
+                push_changed_files(self.repo_id, self.files, "Update", use_auth_token="token")
+        self.assertEqual(server.commits, [])
+
+    def test_sync_repo_file(self):
+        path = self.root / "cache" / "outputs.zip"
+        with fake_hub(files=self.remote_files) as server:
+            self.assertTrue(sync_repo_file(self.repo_id, "outputs.zip", path, use_auth_token="token"))
+            self.assertEqual(path.read_bytes(), b"zip" * 1000)
+            # The local copy is up to date
+            self.assertFalse(sync_repo_file(self.repo_id, "outputs.zip", path, use_auth_token="token"))
+            server.files[(self.repo_id, "main", "outputs.zip")] = b"updated"
+            self.assertTrue(sync_repo_file(self.repo_id, "outputs.zip", path, use_auth_token="token"))
+            self.assertEqual(path.read_bytes(), b"updated")
+            self.assertFalse(sync_repo_file(self.repo_id, "missing.zip", self.root / "missing.zip"))
+        self.assertEqual(len([p for _, p in server.requests if "/resolve/" in p]), 2)
+
+    def test_get_repo_file_hashes(self):
+        with fake_hub(files=self.remote_files):
+            hashes = get_repo_file_hashes(self.repo_id)
+        # The git blob SHA-1 of regular files, as given by `git hash-object`
+        self.assertEqual(hashes["README.md"], hashlib.sha1(b"blob 8\0# Scores").hexdigest())
+        self.assertEqual(hashes["outputs.zip"], hashlib.sha256(b"zip" * 1000).hexdigest())
+
+
+class IsTimeBetweenBatchTest(TestCase):
+    def test_matches_scalar_filter(self):
+        check_times = [
+            "2022-06-18T23:59:59.000Z",
+            "2022-06-19T00:00:00.000Z",
+            "2022-06-20T12:00:00.000Z",
+            "2022-06-22T00:00:00.000Z",
+            "2022-06-22T00:00:01.000Z",
+        ]
+        for begin_time, end_time in [("2022-06-19", "2022-06-22"), ("2022-06-22", "2022-06-19")]:
+            mask = is_time_between_batch(begin_time, end_time, check_times)
+            expected = [is_time_between(begin_time, end_time, t) for t in check_times]
+            self.assertEqual(mask.tolist(), expected)
+        self.assertEqual(
+            is_time_between_batch("2022-06-19", "2022-06-22", check_times).tolist(), [False, True, True, True, False]
+        )
+
+    def test_crosses_midnight(self):
+        check_times = ["2022-06-20T23:00:00Z", "2022-06-20T12:00:00Z"]
+        mask = is_time_between_batch("2022-06-20 22:00", "2022-06-20 02:00", check_times)
+        self.assertEqual(mask.tolist(), [True, False])
+
+    def test_timezones(self):
+        # Naive window bounds are UTC, while aware bounds and timestamps are converted to UTC
+        check_times = ["2022-06-20T01:30:00+02:00", "2022-06-19T23:30:00", None]
+        mask = is_time_between_batch("2022-06-20", "2022-06-21", check_times)
+        self.assertEqual(mask.tolist(), [False, False, False])
+        begin_time = pd.Timestamp("2022-06-20", tz="Europe/Paris")
+        self.assertEqual(is_time_between_batch(begin_time, "2022-06-21", check_times).tolist(), [True, True, False])
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+
+# Cumulative time of `import hf_benchmarks` in a fresh interpreter, as reported by `python -X importtime`. Importing
+# pandas, requests or huggingface_hub alone takes longer than this
+IMPORT_TIME_BUDGET_US = 200_000
+
+HEAVY_MODULES = ["datasets", "evaluate", "huggingface_hub", "pandas", "requests", "sklearn", "typer"]
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+
+
+class ImportTimeTest(TestCase):
+    def test_import_is_within_budget(self):
+        output = run_python("import hf_benchmarks")
+        # Lines are formatted as `import time: self [us] | cumulative | imported package`
+        cumulative_us = [
+            int(line.split("|")[1])
+            for line in output.stderr.splitlines()
+            if line.startswith("import time:") and line.split("|")[2].strip() == "hf_benchmarks"
+        ]
+        self.assertEqual(len(cumulative_us), 1)
+        self.assertLess(cumulative_us[0], IMPORT_TIME_BUDGET_US)
+
+    def test_heavy_dependencies_are_imported_on_first_use(self):
+        code = (
+            "import sys; from hf_benchmarks import Evaluation, load_json, is_time_between_batch; "
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules]); "
+            "from hf_benchmarks import get_benchmark_repos; "
+            "print('huggingface_hub' in sys.modules)"
+        )
+        self.assertEqual(run_python(code).stdout.splitlines(), ["[]", "False"])
+
+    def test_unknown_attribute(self):
+        import hf_benchmarks
+
+        with self.assertRaises(AttributeError):
+            hf_benchmarks.not_an_attribute
+        self.assertIn("get_benchmark_repos", dir(hf_benchmarks))
@@ -0,0 +1,133 @@
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from sklearn import metrics as sk_metrics
+
+from hf_benchmarks import get_metric, metrics, warm_metrics
+from hf_benchmarks.metrics import ClassificationMetric, classification_metrics, confusion_matrix, f1_score
+
+
+class ConfusionMatrixTest(TestCase):
+    def test_matches_sklearn(self):
+        rng = np.random.default_rng(0)
+        references, predictions = rng.integers(0, 5, size=1000), rng.integers(1, 6, size=1000)
+        matrix, labels = confusion_matrix(references, predictions)
+        np.testing.assert_array_equal(labels, np.arange(6))
+        np.testing.assert_array_equal(matrix, sk_metrics.confusion_matrix(references, predictions))
+
+    def test_string_labels(self):
+        matrix, labels = confusion_matrix(np.array(["b", "a", "b"]), np.array(["b", "b", "c"]))
+        self.assertEqual(labels.tolist(), ["a", "b", "c"])
+        np.testing.assert_array_equal(matrix, [[0, 1, 0], [0, 1, 1], [0, 0, 0]])
+
+    def test_raises_on_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            confusion_matrix(np.arange(3), np.arange(2))
+
+    def test_explicit_labels(self):
+        matrix, labels = confusion_matrix(np.array([0, 2]), np.array([2, 2]), labels=np.array([0, 1, 2]))
+        np.testing.assert_array_equal(matrix, [[0, 0, 1], [0, 0, 0], [0, 0, 1]])
+        with self.assertRaisesRegex(ValueError, r"Labels \[1, 3\] are not in"):
+            confusion_matrix(np.array([0, 1]), np.array([2, 3]), labels=np.array([0, 2]))
+
+
+class ClassificationMetricsTest(TestCase):
+    def assert_matches_sklearn(self, references, predictions, average):
+        scores = classification_metrics(references, predictions, average=average)
+        kwargs = {"average": average, "zero_division": 0}
+        self.assertAlmostEqual(scores["accuracy"], sk_metrics.accuracy_score(references, predictions))
+        self.assertAlmostEqual(scores["precision"], sk_metrics.precision_score(references, predictions, **kwargs))
+        self.assertAlmostEqual(scores["recall"], sk_metrics.recall_score(references, predictions, **kwargs))
+        self.assertAlmostEqual(scores["f1"], sk_metrics.f1_score(references, predictions, **kwargs))
+
+    def test_multiclass_matches_sklearn(self):
+        rng = np.random.default_rng(0)
+        for num_labels in [3, 10, 77]:
+            references = rng.integers(0, num_labels, size=500)
+            # Make some predictions right, and some predicted labels absent from the references
+            predictions = np.where(rng.random(500) < 0.5, references, rng.integers(0, num_labels + 2, size=500))
+            for average in ["micro", "macro", "weighted"]:
+                with self.subTest(num_labels=num_labels, average=average):
+                    self.assert_matches_sklearn(references, predictions, average)
+
+    def test_binary_matches_sklearn(self):
+        rng = np.random.default_rng(1)
+        references, predictions = rng.integers(0, 2, size=200), rng.integers(0, 2, size=200)
+        for average in ["binary", "micro", "macro", "weighted"]:
+            with self.subTest(average=average):
+                self.assert_matches_sklearn(references, predictions, average)
+
+    def test_ill_defined_scores_are_zero(self):
+        # No positive references or predictions
+        self.assert_matches_sklearn(np.zeros(5, dtype=int), np.zeros(5, dtype=int), "binary")
+        # A label that is never predicted
+        self.assert_matches_sklearn(np.array([0, 1, 2]), np.array([0, 1, 1]), "macro")
+
+    def test_f1_score(self):
+        references, predictions = np.array([0, 1, 2, 2, 1]), np.array([0, 2, 2, 2, 1])
+        self.assertAlmostEqual(
+            f1_score(references, predictions), sk_metrics.f1_score(references, predictions, average="macro")
+        )
+
+    def test_raises_on_unknown_average(self):
+        with self.assertRaises(ValueError):
+            classification_metrics(np.arange(3), np.arange(3), average="samples")
+        with self.assertRaises(ValueError):
+            classification_metrics(np.arange(3), np.arange(3), average="binary")
+
+
+class GetMetricTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metrics_cache = patch.object(metrics, "METRICS_CACHE", Path(self.tmp_dir.name))
+        self.metrics_cache.start()
+        metrics._metrics.clear()
+
+    def tearDown(self):
+        self.metrics_cache.stop()
+        self.tmp_dir.cleanup()
+        metrics._metrics.clear()
+
+    def test_builtin_metrics_are_memoised(self):
+        f1 = get_metric("f1")
+        self.assertIsInstance(f1, ClassificationMetric)
+        self.assertIs(get_metric("f1"), f1)
+        references, predictions = np.array([0, 1, 2, 2]), np.array([0, 2, 2, 2])
+        self.assertEqual(
+            f1.compute(predictions=predictions, references=references, average="macro"),
+            {"f1": f1_score(references, predictions, average="macro")},
+        )
+        accuracy = get_metric("accuracy").compute(predictions=predictions, references=references)
+        self.assertEqual(accuracy, {"accuracy": 0.75})
+
+    def test_other_metrics_are_loaded_once(self):
+        with patch("evaluate.load", side_effect=lambda path, **config: object()) as load:
+            metric = get_metric("bleu")
+            self.assertIs(get_metric("bleu"), metric)
+            self.assertIsNot(get_metric("bleu", config_name="other"), metric)
+            self.assertIsNot(get_metric("f1", config_name="multilabel"), metric)
+        self.assertEqual([c.args for c in load.call_args_list], [("bleu",), ("bleu",), ("f1",)])
+
+    def test_loads_pinned_metric_scripts(self):
+        local_path = Path(self.tmp_dir.name) / "bleu"
+        local_path.mkdir()
+        (local_path / "bleu.py").touch()
+        with patch("evaluate.load") as load:
+            get_metric("bleu")
+        load.assert_called_once_with(str(local_path))
+
+    def test_concurrent_calls_load_once(self):
+        with patch("evaluate.load", side_effect=lambda path, **config: time.sleep(0.05) or object()) as load:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                loaded = list(executor.map(lambda _: get_metric("bleu"), range(8)))
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(len({id(metric) for metric in loaded}), 1)
+
+    def test_warm_metrics(self):
+        warm_metrics(["f1", "accuracy"])
+        self.assertEqual({name for name, _ in metrics._metrics}, {"f1", "accuracy"})
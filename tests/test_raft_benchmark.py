@@ -0,0 +1,79 @@
+import importlib
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from datasets import Dataset
+from sklearn.metrics import f1_score
+
+from hf_benchmarks import AlignmentError
+
+
+TASKS = ["ade_corpus_v2", "banking_77", "neurips_impact_statement_risks", "one_stop_english", "tweet_eval_hate"]
+
+
+class RaftBenchmarkTest(TestCase):
+    def setUp(self):
+        self.eval_module = importlib.import_module("benchmarks.raft.evaluation")
+        rng = np.random.default_rng(0)
+        self.datasets = {}
+        for i, task in enumerate(TASKS):
+            num_rows = 20 + i
+            # Shuffled IDs so that the evaluation has to sort both datasets before comparing them
+            ids = rng.permutation(num_rows)
+            self.datasets[("labels", task)] = Dataset.from_dict(
+                {"ID": ids, "Label": rng.integers(0, 3, size=num_rows)}
+            )
+            sub_ids = rng.permutation(num_rows)
+            self.datasets[("submission", task)] = Dataset.from_dict(
+                {"ID": sub_ids, "Label": rng.integers(0, 3, size=num_rows)}
+            )
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def load_dataset(self, path, name, use_auth_token, split):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        # Simulate a download so that concurrent loads overlap
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return self.datasets[(path, name)]
+
+    def expected_f1(self, task):
+        labels = self.datasets[("labels", task)].sort("ID")["Label"]
+        predictions = self.datasets[("submission", task)].sort("ID")["Label"]
+        return f1_score(labels, predictions, average="macro")
+
+    def compute_metrics(self, num_workers):
+        with patch.object(
+            self.eval_module, "get_dataset_config_names", return_value=list(reversed(TASKS))
+        ), patch.object(self.eval_module, "load_dataset", self.load_dataset):
+            references = self.eval_module._load_references("labels", "token", num_workers=num_workers)
+            submission = {"submission_dataset": "submission"}
+            return self.eval_module._score_submission(references, submission, "token", num_workers=num_workers)
+
+    def test_results_are_in_sorted_task_order(self):
+        evaluation = self.compute_metrics(num_workers=4)
+        self.assertEqual([r["task"]["name"] for r in evaluation["results"]], sorted(TASKS))
+        for result in evaluation["results"]:
+            task = result["task"]
+            self.assertEqual([(m["name"], m["type"]) for m in task["metrics"]], [("f1", "f1")])
+            self.assertAlmostEqual(task["metrics"][0]["value"], self.expected_f1(task["name"]))
+
+    def test_parallel_matches_serial(self):
+        serial = self.compute_metrics(num_workers=1)
+        self.assertEqual(self.max_active, 1)
+        parallel = self.compute_metrics(num_workers=4)
+        self.assertGreater(self.max_active, 1)
+        self.assertEqual(serial, parallel)
+
+    def test_raises_on_missing_ids(self):
+        task = TASKS[0]
+        self.datasets[("submission", task)] = self.datasets[("submission", task)].select(range(10))
+        with self.assertRaises(AlignmentError):
+            self.compute_metrics(num_workers=1)
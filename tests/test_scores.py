@@ -0,0 +1,74 @@
+import json
+import math
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from hf_benchmarks import round_scores, save_scores_table, scores_to_table, table_to_scores
+
+
+class ScoresTableTest(TestCase):
+    def setUp(self):
+        self.submissions = [
+            {
+                "submission_name": "a",
+                "param_count": 1000,
+                "common_gen": {
+                    "bleu": 0.123456,
+                    "rouge1": {"precision": 0.5, "recall": 0.333333, "fmeasure": 0.4},
+                    "msttr-100": float("nan"),
+                    "predictions_file": "a.json",
+                    "empty": {},
+                },
+                "xsum": {"bleu": 0.25},
+            },
+            {"submission_name": "b", "web_nlg": {"bleu": 0.987654, "vocab_size": 42}},
+        ]
+
+    def test_round_trip(self):
+        table = scores_to_table(self.submissions)
+        self.assertEqual(table["submission"].unique().tolist(), [0, 1])
+        rebuilt = table_to_scores(table)
+        self.assertEqual(json.dumps(rebuilt), json.dumps(self.submissions))
+        # Converting the same table twice gives the same scores
+        self.assertEqual(json.dumps(table_to_scores(table)), json.dumps(self.submissions))
+
+    def test_round_scores(self):
+        table = round_scores(scores_to_table(self.submissions))
+        scores = table_to_scores(table)
+        self.assertEqual(scores[0]["common_gen"]["bleu"], round(0.123456, 3))
+        self.assertEqual(scores[0]["common_gen"]["rouge1"]["recall"], round(0.333333, 3))
+        self.assertTrue(math.isnan(scores[0]["common_gen"]["msttr-100"]))
+        self.assertEqual(scores[0]["param_count"], 1000)
+        self.assertEqual(scores[1]["web_nlg"], {"bleu": round(0.987654, 3), "vocab_size": 42})
+
+    def test_filtering_keeps_datasets_and_fields(self):
+        table = scores_to_table(self.submissions)
+        filtered = table[table["metric"].isna() | table["metric"].isin(["rouge1"])]
+        scores = table_to_scores(filtered)
+        self.assertEqual(
+            scores,
+            [
+                {
+                    "submission_name": "a",
+                    "param_count": 1000,
+                    "common_gen": {"rouge1": {"precision": 0.5, "recall": 0.333333, "fmeasure": 0.4}},
+                    "xsum": {},
+                },
+                {"submission_name": "b", "web_nlg": {}},
+            ],
+        )
+
+    def test_save_scores_table(self):
+        table = scores_to_table(self.submissions)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "scores" / "scores.parquet"
+            save_scores_table(table, path)
+            saved = pd.read_parquet(path)
+        self.assertEqual(len(saved), table["metric"].notna().sum())
+        self.assertTrue(saved["metric"].notna().all())
+        web_nlg = saved[saved["dataset"] == "web_nlg"].set_index("metric")
+        self.assertEqual(web_nlg.loc["bleu", "score"], 0.987654)
+        self.assertEqual(json.loads(web_nlg.loc["vocab_size", "value"]), 42)
@@ -0,0 +1,49 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from huggingface_hub.hf_api import DatasetInfo
+
+from hf_benchmarks import SubmissionStateStore, get_benchmark_repos
+
+from .testing_utils import make_dataset_info
+
+
+def make_submission(repo_id, sha):
+    return DatasetInfo(**make_dataset_info(repo_id, sha=sha))
+
+
+class SubmissionStateStoreTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SubmissionStateStore(Path(self.tmp_dir.name) / "submissions.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_filter_new(self):
+        submissions = [make_submission("user/a", "sha-a"), make_submission("user/b", "sha-b")]
+        self.store.mark_dispatched(submissions[0])
+        self.assertTrue(self.store.is_dispatched("user/a", "sha-a"))
+        self.assertEqual([s.id for s in self.store.filter_new(submissions)], ["user/b"])
+
+    def test_new_commit_is_unseen(self):
+        self.store.mark_dispatched(make_submission("user/a", "sha-1"))
+        self.assertEqual(len(self.store.filter_new([make_submission("user/a", "sha-2")])), 1)
+
+    def test_state_persists_across_instances(self):
+        self.store.mark_dispatched(make_submission("user/a", "sha-a"))
+        store = SubmissionStateStore(self.store.path)
+        self.assertTrue(store.is_dispatched("user/a", "sha-a"))
+        store.forget("user/a")
+        self.assertFalse(self.store.is_dispatched("user/a", "sha-a"))
+
+    def test_get_benchmark_repos_only_new(self):
+        page = [make_dataset_info("user/a", sha="sha-a"), make_dataset_info("user/b", sha="sha-b")]
+        self.store.mark_dispatched(make_submission("user/b", "sha-b"))
+        with patch("hf_benchmarks.hub._iter_dataset_pages", side_effect=lambda **kwargs: iter([page])):
+            data = get_benchmark_repos("dummy", only_new=True, state_store=self.store)
+            self.assertEqual([s.id for s in data], ["user/a"])
+            data = get_benchmark_repos("dummy")
+            self.assertEqual(len(data), 2)
@@ -1,5 +1,297 @@
+import base64
+import hashlib
+import json
+import socket
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, unquote, urlparse
+
+
 BOGUS_BENCHMARK_NAME = "bogus"
 DUMMY_BENCHMARK_NAME = "dummy"
 DUMMY_EVALUATION_ID = "lewtun/benchmarks-dummy-evaluation"
 DUMMY_PRIVATE_LABELS_ID = "lewtun/benchmarks-dummy-private-labels"
 DUMMY_SUBMISSION_ID = "lewtun/benchmarks-dummy-submission"
+
+
+def make_dataset_info(
+    repo_id: str,
+    sha: str = "0" * 40,
+    last_modified: str = "2022-06-20T12:00:00.000Z",
+    benchmark: str = DUMMY_BENCHMARK_NAME,
+    repo_type: str = "prediction",
+    submission_name: str = None,
+) -> dict:
+    """Returns the raw metadata of a benchmark repository, as listed by the Hub's `/api/datasets` endpoint."""
+    card_data = {"benchmark": benchmark, "type": repo_type, "submission_name": submission_name or repo_id}
+    return {
+        "id": repo_id,
+        "sha": sha,
+        "lastModified": last_modified,
+        "tags": [f"benchmark:{benchmark}"],
+        "cardData": card_data,
+    }
+
+
+class _FakeServer:
+    """Base class for local HTTP servers that stand in for remote APIs in tests, served from a thread."""
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _JSONRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status_code, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAutoTrainServer(_FakeServer):
+    """A local stand-in for the AutoTrain API.
+
+    `GET /projects/{id}` reports a pending status until the project is ready, and any `POST` echoes its JSON payload.
+
+    Args:
+        polls_until_ready: Mapping from project ID to the number of status requests answered with a pending status
+            before the project reports `ready_status`.
+        ready_status: The status reported once a project is ready.
+        errors: A list of `(status_code, headers)` tuples used to answer the first requests, whatever their path.
+    """
+
+    def __init__(self, polls_until_ready: dict = None, ready_status: int = 3, errors: list = None):
+        self.polls_until_ready = dict(polls_until_ready or {})
+        self.ready_status = ready_status
+        self.errors = list(errors or [])
+        self.client_ports = set()
+        super().__init__()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(_JSONRequestHandler):
+            def _handle_error(self):
+                with server._lock:
+                    server.requests.append((self.command, self.path))
+                    server.client_ports.add(self.client_address[1])
+                    error = server.errors.pop(0) if server.errors else None
+                if error is not None:
+                    status_code, headers = error
+                    self.send_json(status_code, {"error": "fake error"}, headers)
+                return error is not None
+
+            def do_GET(self):
+                if self._handle_error():
+                    return
+                with server._lock:
+                    project_id = int(self.path.rstrip("/").split("/")[-1])
+                    remaining = server.polls_until_ready.get(project_id)
+                    if remaining is not None:
+                        server.polls_until_ready[project_id] = max(remaining - 1, 0)
+                if remaining is None:
+                    self.send_json(404, {"error": "project not found"})
+                else:
+                    status = server.ready_status if remaining == 0 else 1
+                    self.send_json(200, {"id": project_id, "status": status})
+
+            def do_POST(self):
+                payload = json.loads(self.read_body() or b"null")
+                if self._handle_error():
+                    return
+                self.send_json(200, {"path": self.path, "payload": payload})
+
+        return Handler
+
+
+class FakeHubServer(_FakeServer):
+    """A local stand-in for the Hugging Face Hub API.
+
+    `GET /api/datasets` pages through `datasets`, returning the cursor to the next page in the `Link` header like
+    the Hub does. Datasets are filtered on their tags when a `filter` is passed. Files are served from
+    `GET /datasets/{repo_id}/resolve/{revision}/{filename}`, and the files of the `main` revision are listed with
+    their hashes by `GET /api/datasets/{repo_id}`.
+
+    Commits follow the Hub's HTTP commit API: the `preupload` endpoint stores files with one of `lfs_extensions` in
+    LFS, whose content is uploaded through the LFS batch endpoint before the `commit` endpoint adds all the files to
+    the `main` revision.
+
+    Args:
+        datasets: The raw metadata of the datasets hosted on the fake Hub.
+        page_size: The number of datasets per page.
+        files: Mapping from `(repo_id, revision, filename)` to the content of the file.
+        lfs_extensions: The extensions of the files stored in LFS.
+    """
+
+    def __init__(
+        self, datasets: list = None, page_size: int = 2, files: dict = None, lfs_extensions: tuple = (".zip",)
+    ):
+        self.datasets = list(datasets or [])
+        self.page_size = page_size
+        self.files = dict(files or {})
+        self.lfs_extensions = lfs_extensions
+        self.lfs_objects = {}
+        self.commits = []
+        self.repo_shas = {}
+        super().__init__()
+
+    def repo_sha(self, repo_id: str) -> str:
+        return self.repo_shas.get(repo_id, "0" * 40)
+
+    def is_lfs(self, filename: str) -> bool:
+        return filename.endswith(self.lfs_extensions)
+
+    def repo_info(self, repo_id: str) -> dict:
+        siblings = []
+        for (file_repo_id, revision, filename), content in self.files.items():
+            if file_repo_id != repo_id or revision != "main":
+                continue
+            sibling = {"rfilename": filename, "size": len(content)}
+            if self.is_lfs(filename):
+                sibling["lfs"] = {"sha256": hashlib.sha256(content).hexdigest(), "size": len(content)}
+            else:
+                sibling["blobId"] = hashlib.sha1(f"blob {len(content)}\0".encode() + content).hexdigest()
+            siblings.append(sibling)
+        return {"id": repo_id, "sha": self.repo_sha(repo_id), "siblings": siblings}
+
+    def commit(self, repo_id: str, payload: dict) -> dict:
+        for file in payload["files"]:
+            self.files[(repo_id, "main", file["path"])] = base64.b64decode(file["content"])
+        for file in payload["lfsFiles"]:
+            self.files[(repo_id, "main", file["path"])] = self.lfs_objects[file["oid"]]
+        self.commits.append((repo_id, payload))
+        sha = hashlib.sha1(json.dumps(payload).encode()).hexdigest()
+        self.repo_shas[repo_id] = sha
+        return {"commitUrl": f"{self.url}/datasets/{repo_id}/commit/{sha}", "commitOid": sha}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(_JSONRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with server._lock:
+                    server.requests.append(("GET", self.path))
+                if url.path.startswith("/datasets/"):
+                    self._send_file(url.path)
+                    return
+                if url.path.startswith("/api/datasets/"):
+                    repo_id = unquote(url.path[len("/api/datasets/") :]).partition("/revision/")[0]
+                    with server._lock:
+                        self.send_json(200, server.repo_info(repo_id))
+                    return
+                if url.path != "/api/datasets":
+                    self.send_json(404, {"error": "not found"})
+                    return
+                datasets = server.datasets
+                if "filter" in query:
+                    datasets = [d for d in datasets if query["filter"][0] in d.get("tags", [])]
+                cursor = int(query.get("cursor", [0])[0])
+                headers = {}
+                if cursor + server.page_size < len(datasets):
+                    filter_param = f"filter={query['filter'][0]}&" if "filter" in query else ""
+                    next_url = f"{server.url}/api/datasets?{filter_param}cursor={cursor + server.page_size}"
+                    headers["Link"] = f'<{next_url}>; rel="next"'
+                self.send_json(200, datasets[cursor : cursor + server.page_size], headers)
+
+            def _send_file(self, path):
+                repo_id, _, rest = unquote(path[len("/datasets/") :]).partition("/resolve/")
+                revision, _, filename = rest.partition("/")
+                content = server.files.get((repo_id, revision, filename))
+                if content is None:
+                    self.send_json(404, {"error": "file not found"})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                payload = json.loads(self.read_body())
+                with server._lock:
+                    server.requests.append(("POST", self.path))
+                    if path.endswith(".git/info/lfs/objects/batch"):
+                        self.send_json(200, {"objects": [self._lfs_batch_action(obj) for obj in payload["objects"]]})
+                        return
+                    repo_id, _, action = path[len("/api/datasets/") :].rpartition("/")[0].rpartition("/")
+                    if action == "preupload":
+                        modes = [
+                            {"path": f["path"], "uploadMode": "lfs" if server.is_lfs(f["path"]) else "regular"}
+                            for f in payload["files"]
+                        ]
+                        self.send_json(200, {"files": modes})
+                    elif action != "commit":
+                        self.send_json(404, {"error": "not found"})
+                    elif payload.get("parentCommit", server.repo_sha(repo_id)) != server.repo_sha(repo_id):
+                        self.send_json(412, {"error": "a commit has happened since the parent commit"})
+                    else:
+                        self.send_json(200, server.commit(repo_id, payload))
+
+            def do_PUT(self):
+                content = self.read_body()
+                with server._lock:
+                    server.requests.append(("PUT", self.path))
+                    server.lfs_objects[self.path.rpartition("/")[2]] = content
+                self.send_json(200, {})
+
+            def _lfs_batch_action(self, obj):
+                if obj["oid"] in server.lfs_objects:
+                    return obj
+                return {**obj, "actions": {"upload": {"href": f"{server.url}/lfs/{obj['oid']}"}}}
+
+        return Handler
+
+
+@contextmanager
+def fake_hub(datasets: list = None, page_size: int = 2, files: dict = None, lfs_extensions: tuple = (".zip",)):
+    """Serves a `FakeHubServer` and points `huggingface_hub` at it."""
+    with FakeHubServer(datasets, page_size=page_size, files=files, lfs_extensions=lfs_extensions) as server:
+        with patch("huggingface_hub.constants.ENDPOINT", server.url):
+            yield server
+
+
+@contextmanager
+def stalled_hub():
+    """Points `huggingface_hub` at a server that accepts connections but never answers, to test timeouts."""
+    with socket.socket() as sock:
+        # Connections are queued by the listening socket, but never accepted
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        host, port = sock.getsockname()
+        with patch("huggingface_hub.constants.ENDPOINT", f"http://{host}:{port}"):
+            yield